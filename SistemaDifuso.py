@@ -56,11 +56,12 @@ regla9 = ctrl.Rule(~retraso['alto'] & calidad['alta'], confiabilidad['muy alta']
 control_system = ctrl.ControlSystem([regla1, regla2, regla3, regla4, regla5, regla6, regla7, regla8, regla9])
 simulador_confiabilidad = ctrl.ControlSystemSimulation(control_system)
 
-# Ejemplo de uso:
-# Supongamos que un proveedor tiene: retraso = 3 días, calidad = 8, confiabilidad previa = 6
-simulador_confiabilidad.input['retraso'] = 3
-simulador_confiabilidad.input['calidad'] = 8
+if __name__ == "__main__":
+    # Ejemplo de uso:
+    # Supongamos que un proveedor tiene: retraso = 3 días, calidad = 8, confiabilidad previa = 6
+    simulador_confiabilidad.input['retraso'] = 3
+    simulador_confiabilidad.input['calidad'] = 8
 
-simulador_confiabilidad.compute()
+    simulador_confiabilidad.compute()
 
-print(f"Confiabilidad final del proveedor: {simulador_confiabilidad.output['confiabilidad']:.2f}")
+    print(f"Confiabilidad final del proveedor: {simulador_confiabilidad.output['confiabilidad']:.2f}")
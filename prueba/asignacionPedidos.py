@@ -0,0 +1,68 @@
+# asignacionPedidos.py
+"""
+Asignación agregada de stock a pedidos.
+
+En vez de comparar cada Pedido por separado con el Stock de su producto (una
+activación por par Pedido×Stock, sin ver los otros pedidos del mismo producto),
+los pedidos pendientes de cada producto se atienden del más antiguo al más
+nuevo, consumiendo lo que queda de su stock, y al final hay una sola decisión
+por producto (cubierto o faltante a reponer). Los productos no compiten por el
+stock, así que cada uno se asigna por separado; la prioridad (primero los de
+categoría Crítico, después por nivel de demanda y antigüedad) solo ordena las
+decisiones que se informan.
+"""
+
+# Menor = se informa antes
+PRIORIDAD_DEMANDA = {"Alta": 0, "Media": 1, "Baja": 2}
+CATEGORIAS_CRITICAS = {"Critico", "Crítico"}
+
+def prioridad(categorias, nivel, edad):
+    """Clave de orden: (no crítico, demanda, edad del pedido más antiguo)."""
+    critico = 0 if CATEGORIAS_CRITICAS.intersection(categorias) else 1
+    return (critico, PRIORIDAD_DEMANDA.get(nivel, len(PRIORIDAD_DEMANDA)), edad)
+
+def asignar_producto(producto, stock, cantidades):
+    """
+    Reparte el stock de un producto entre sus pedidos (cantidades, del más
+    antiguo al más nuevo). Sin stock cuenta como 0.
+    """
+    disponible = restante = max(int(stock), 0)
+    asignaciones = []
+    for q in cantidades:
+        asignado = min(q, restante)
+        restante -= asignado
+        asignaciones.append(asignado)
+    total, asignado = sum(cantidades), sum(asignaciones)
+    return {"producto": producto, "stock": disponible, "pedidos": len(cantidades),
+            "total_pedido": total, "asignado": asignado, "faltante": total - asignado,
+            "asignaciones": asignaciones}
+
+def asignar_por_producto(por_producto, stocks, categorias=None, demandas=None):
+    """
+    - por_producto: producto -> [(edad, cantidad)]; menor edad = más antiguo
+    - stocks: producto -> cantidad disponible
+    - categorias: producto -> [nombre]; demandas: producto -> nivel
+    Devuelve una decisión por producto con pedidos, ordenadas por prioridad().
+    """
+    categorias = categorias or {}
+    demandas = demandas or {}
+    decisiones = []
+    for p, pedidos in por_producto.items():
+        if not pedidos:
+            continue
+        pedidos = sorted(pedidos, key=lambda e: e[0])
+        d = asignar_producto(p, stocks.get(p, 0), [q for _, q in pedidos])
+        decisiones.append((prioridad(categorias.get(p, ()), demandas.get(p), pedidos[0][0]), d))
+    decisiones.sort(key=lambda e: e[0])  # sort estable
+    return [d for _, d in decisiones]
+
+def asignar_pedidos(pedidos, stocks, categorias=None, demandas=None):
+    """
+    Como asignar_por_producto, a partir de un iterable de (producto, cantidad, edad).
+    Devuelve dicts con producto, stock, pedidos, total_pedido, asignado, faltante
+    y asignaciones (lo asignado a cada pedido, del más antiguo al más nuevo).
+    """
+    por_producto = {}
+    for p, q, edad in pedidos:
+        por_producto.setdefault(p, []).append((edad, q))
+    return asignar_por_producto(por_producto, stocks, categorias, demandas)
@@ -0,0 +1,123 @@
+# benchmark.py
+"""
+Benchmark de punta a punta sobre catálogos sintéticos (ver generador.py).
+
+Mide por separado cada fase (tiempo de pared y pico de memoria con tracemalloc):
+build, reason_and_compare (y el perfil lite), serialize_turtle, fuzzy scoring, graph_to_facts,
+engine.run (reglas originales y filtradas con P()/TEST(), con el tamaño de
+agenda de cada una), el barrido equivalente con motorColumnar y los niveles de
+demanda derivados de un historial de stock sintético (--dias), y deja un
+reporte JSON comparable entre corridas.
+
+Uso:
+    python prueba/benchmark.py --productos 1000 5000 --proveedores 50 --salida bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from ontologia import build_ontology, reason_and_compare, reason_lite, serialize_turtle, suppliers, BASE
+from generador import generar_datos, generar_historial
+from historialStock import HistorialStock
+from translator import graph_to_facts, iter_facts
+from motorColumnar import MotorColumnar
+from prueba.sistemaDifuso import obtener_controlador
+from prueba.sistemaInventario import crear_motor, NullSink
+
+# tracemalloc encarece bastante cada asignación; con --sin-memoria solo se mide tiempo
+MEDIR_MEMORIA = True
+
+def medir(resultados, fase, funcion, *args, **kwargs):
+    if MEDIR_MEMORIA:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    valor = funcion(*args, **kwargs)
+    segundos = time.perf_counter() - t0
+    resultados[fase] = {"segundos": round(segundos, 6)}
+    if MEDIR_MEMORIA:
+        resultados[fase]["pico_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return valor
+
+def puntuar_proveedores(g, controlador):
+    leads, cals = [], []
+    for prov in suppliers(g):
+        lead, cal = g.value(prov, BASE.leadTimeDias), g.value(prov, BASE.calidad)
+        if lead is not None and cal is not None:
+            leads.append(int(lead))
+            cals.append(int(cal))
+    return controlador.evaluar_batch(leads, cals) if leads else []
+
+def correr_escenario(n_productos, n_proveedores, n_categorias, n_pedidos, semilla, dias=90):
+    datos = generar_datos(n_productos, n_proveedores, n_categorias, n_pedidos, semilla=semilla)
+    fases = {}
+    g = medir(fases, "build", build_ontology, datos)
+    n_base = len(g)
+    _, g_lite, _ = medir(fases, "reason_lite", reason_lite, build_ontology(datos))
+    _, g, inferidos = medir(fases, "reason_and_compare", reason_and_compare, g)
+    with tempfile.TemporaryDirectory() as tmp:
+        medir(fases, "serialize_turtle", serialize_turtle, g, os.path.join(tmp, "bench.ttl"))
+    controlador = obtener_controlador()
+    medir(fases, "fuzzy_scoring", puntuar_proveedores, g, controlador)
+    agenda = {}
+    for reglas, sufijo in (("original", ""), ("filtrado", "_filtrado")):
+        engine = crear_motor(reglas, sink=NullSink())
+        engine.reset()
+        n_hechos = medir(fases, "graph_to_facts" + sufijo, graph_to_facts, g, engine)
+        medir(fases, "engine_run" + sufijo, engine.run)
+        agenda[reglas] = dict(engine.estadisticas)
+    columnar = MotorColumnar(sink=NullSink())
+    medir(fases, "columnar_carga", columnar.cargar, iter_facts(g))
+    medir(fases, "columnar_run", columnar.run)
+    with tempfile.TemporaryDirectory() as tmp:
+        historial = HistorialStock(os.path.join(tmp, "historial.bin"))
+        medir(fases, "historial_carga", generar_historial, historial, datos, dias, semilla=semilla)
+        medir(fases, "historial_niveles", historial.niveles_demanda)
+        n_snapshots = len(historial)
+        historial.cerrar()
+    return {
+        "config": {"productos": n_productos, "proveedores": n_proveedores,
+                   "categorias": n_categorias, "pedidos": n_pedidos, "semilla": semilla},
+        "conteos": {"triples_base": n_base, "triples_razonados": len(g),
+                    "inferidos": len(inferidos), "triples_lite": len(g_lite), "hechos": n_hechos,
+                    "snapshots_stock": n_snapshots},
+        "agenda": agenda,
+        "fases": fases,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, nargs="+", default=[100, 1000])
+    ap.add_argument("--proveedores", type=int, default=50)
+    ap.add_argument("--categorias", type=int, default=3)
+    ap.add_argument("--pedidos", type=int, default=None, help="por defecto productos/2")
+    ap.add_argument("--semilla", type=int, default=0)
+    ap.add_argument("--dias", type=int, default=90, help="días de historial de stock sintético")
+    ap.add_argument("--salida", default="benchmark.json")
+    ap.add_argument("--sin-memoria", action="store_true", help="no usar tracemalloc")
+    args = ap.parse_args(argv)
+    global MEDIR_MEMORIA
+    MEDIR_MEMORIA = not args.sin_memoria
+
+    reporte = {
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform(),
+                    "memoria": MEDIR_MEMORIA},
+        "escenarios": [],
+    }
+    for n in args.productos:
+        pedidos = args.pedidos if args.pedidos is not None else n // 2
+        esc = correr_escenario(n, args.proveedores, args.categorias, pedidos, args.semilla, args.dias)
+        reporte["escenarios"].append(esc)
+        resumen = ", ".join(f"{f}={v['segundos']:.3f}s" for f, v in esc["fases"].items())
+        print(f"[{n} productos] {resumen}")
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    print("Reporte:", args.salida)
+    return reporte
+
+if __name__ == "__main__":
+    main()
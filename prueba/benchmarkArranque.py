@@ -0,0 +1,96 @@
+# benchmarkArranque.py
+"""
+Control del tiempo de arranque en frío de cli.py.
+
+Corre cada subcomando en un proceso nuevo (con -X importtime), mide la mediana
+del tiempo de pared y revisa qué paquetes pesados se importaron. Falla (código 1)
+si algún subcomando supera su presupuesto o importa un paquete prohibido.
+Antes de medir hace una pasada de calentamiento (caché de ontologías en un
+directorio temporal; el controlador difuso compilado queda en .cache_controlador/
+del repo).
+
+Uso:
+    python prueba/benchmarkArranque.py [--repeticiones 3] [--presupuesto score=1.0 ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(AQUI)
+PESADOS = ("rdflib", "owlrl", "skfuzzy", "experta", "matplotlib", "numpy", "scipy", "networkx")
+
+# subcomando -> (argumentos, presupuesto en segundos, paquetes que no debe importar)
+ESCENARIOS = {
+    "help": (["--help"], 0.2, PESADOS),
+    "build": (["build", "--salida", "ontologia.bin"], 1.0, ("owlrl", "skfuzzy", "experta", "matplotlib")),
+    "reason": (["reason"], 1.0, ("skfuzzy", "experta", "matplotlib")),
+    "score": (["score"], 0.8, ("owlrl", "skfuzzy", "experta", "matplotlib")),
+    "export": (["export"], 1.0, ("owlrl", "skfuzzy", "experta", "matplotlib")),
+    "run": (["run", "--acciones", "acciones.jsonl"], 1.5, ("owlrl", "skfuzzy", "matplotlib")),
+}
+
+def correr(args, cwd, env):
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.join(AQUI, "cli.py"), *args],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    segundos = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"cli.py {' '.join(args)} falló:\n{proc.stderr[-2000:]}")
+    paquetes = set()
+    for linea in proc.stderr.splitlines():
+        if linea.startswith("import time:") and "|" in linea:
+            nombre = linea.rsplit("|", 1)[1].strip()
+            paquetes.add(nombre.split(".")[0])
+    return segundos, paquetes
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--presupuesto", nargs="*", default=[], metavar="SUB=SEG",
+                    help="reemplaza el presupuesto de un subcomando")
+    ap.add_argument("--salida", default=None, help="reporte JSON opcional")
+    args = ap.parse_args(argv)
+    presupuestos = {k: v[1] for k, v in ESCENARIOS.items()}
+    for item in args.presupuesto:
+        sub, _, seg = item.partition("=")
+        presupuestos[sub] = float(seg)
+
+    reporte, fallas = {}, []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([RAIZ, AQUI]))
+        for sub, (cli_args, _, _) in ESCENARIOS.items():
+            correr(cli_args, tmp, env)  # calentamiento
+        for sub, (cli_args, _, prohibidos) in ESCENARIOS.items():
+            tiempos, paquetes = [], set()
+            for _ in range(args.repeticiones):
+                segundos, paquetes = correr(cli_args, tmp, env)
+                tiempos.append(segundos)
+            mediana = statistics.median(tiempos)
+            pesados = sorted(p for p in paquetes if p in PESADOS)
+            indebidos = sorted(set(prohibidos) & paquetes)
+            reporte[sub] = {"mediana_s": round(mediana, 4), "presupuesto_s": presupuestos[sub],
+                            "pesados": pesados}
+            estado = "ok"
+            if mediana > presupuestos[sub]:
+                estado = "LENTO"
+                fallas.append(f"{sub}: {mediana:.3f}s > {presupuestos[sub]:.3f}s")
+            if indebidos:
+                estado = "IMPORTS"
+                fallas.append(f"{sub}: importa {', '.join(indebidos)}")
+            print(f"{sub:7s} {mediana:7.3f}s / {presupuestos[sub]:.2f}s  [{estado}]  {' '.join(pesados)}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+    if fallas:
+        print("Presupuesto de arranque excedido:\n  " + "\n  ".join(fallas))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# cacheOntologia.py
+import hashlib
+import json
+import os
+from contextlib import nullcontext
+
+from ontologia import (build_ontology, default_data, REASONING_PROFILES,
+                       serialize_binary, load_binary)
+import ontologia
+
+def _huella_codigo():
+    # Si cambia la construcción o el razonamiento, las entradas viejas no sirven
+    with open(ontologia.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class OntologyCache:
+    """
+    Caché en disco de build_ontology + cierre, indexada por un hash de los datos
+    de entrada y del perfil de razonamiento. Cada entrada guarda el grafo razonado
+    y los triples inferidos como snapshots binarios (ver serialize_binary).
+    Desaloja por antigüedad de uso (LRU por mtime) al superar max_entries/max_bytes.
+    """
+
+    def __init__(self, cache_dir=".cache_ontologia", max_entries=16, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, data, profile="rdfs"):
+        h = hashlib.sha256()
+        h.update(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        h.update(profile.encode())
+        h.update(_huella_codigo().encode())
+        return h.hexdigest()
+
+    def _rutas(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".bin", base + ".inf.bin", base + ".json"
+
+    def get_or_build(self, data=None, profile="rdfs", metricas=None):
+        """
+        Devuelve (g_after, inferred, n_before). En un acierto no se construye ni
+        se razona nada; en un fallo se construye, se razona y se guarda.
+        - metricas: Metricas opcional; registra las fases cache_carga / build /
+          rdfs_closure / cache_guardado y el contador cache_hit.
+        """
+        fase = metricas.fase if metricas is not None else (lambda nombre: nullcontext())
+        if data is None:
+            data = default_data()
+        key = self.key(data, profile)
+        ruta_g, ruta_inf, ruta_meta = self._rutas(key)
+        if all(os.path.exists(r) for r in (ruta_g, ruta_inf, ruta_meta)):
+            try:
+                with fase("cache_carga"):
+                    with open(ruta_meta, encoding="utf-8") as f:
+                        meta = json.load(f)
+                    g = load_binary(ruta_g)
+                    if meta.get("profile") == "consulta":
+                        g = ontologia.VistaRDFS(g)  # se guardó sin razonar
+                    inferred = set(load_binary(ruta_inf))
+            except (OSError, ValueError):
+                pass  # entrada dañada: se reconstruye
+            else:
+                for r in (ruta_g, ruta_inf, ruta_meta):
+                    os.utime(r)
+                self.hits += 1
+                self._guardar_stats(hit=True)
+                if metricas is not None:
+                    metricas.fijar("cache_hit", 1)
+                return g, inferred, meta["n_before"]
+
+        self.misses += 1
+        if metricas is not None:
+            metricas.fijar("cache_hit", 0)
+        with fase("build"):
+            g = build_ontology(data)
+        with fase("rdfs_closure"):
+            g_before, g, inferred = REASONING_PROFILES[profile](g)
+        n_before = len(g_before)
+        with fase("cache_guardado"):
+            # una VistaRDFS se guarda sin razonar (recorrerla la materializaría)
+            serialize_binary(getattr(g, "grafo", g), ruta_g)
+            g_inf = ontologia.Graph()
+            for t in inferred:
+                g_inf.add(t)
+            serialize_binary(g_inf, ruta_inf)
+            with open(ruta_meta, "w", encoding="utf-8") as f:
+                json.dump({"n_before": n_before, "n_after": len(g), "profile": profile}, f)
+        self._guardar_stats(hit=False)
+        self._evict()
+        return g, inferred, n_before
+
+    def _entradas(self):
+        # key -> (última vez usada, bytes); solo cuentan las claves con su .json
+        # (stats.json y cualquier otro archivo del directorio no son entradas)
+        nombres = os.listdir(self.cache_dir)
+        claves = {n[:-len(".json")] for n in nombres if n.endswith(".json") and n != "stats.json"}
+        entradas = {}
+        for nombre in nombres:
+            key = nombre.split(".", 1)[0]
+            if key not in claves:
+                continue
+            st = os.stat(os.path.join(self.cache_dir, nombre))
+            usado, tam = entradas.get(key, (0, 0))
+            entradas[key] = (max(usado, st.st_mtime), tam + st.st_size)
+        return entradas
+
+    def _evict(self):
+        entradas = self._entradas()
+        orden = sorted(entradas, key=lambda k: entradas[k][0])  # más vieja primero
+        total = sum(tam for _, tam in entradas.values())
+        while orden and (len(orden) > self.max_entries
+                         or (self.max_bytes is not None and total > self.max_bytes and len(orden) > 1)):
+            key = orden.pop(0)
+            total -= entradas[key][1]
+            for r in self._rutas(key):
+                if os.path.exists(r):
+                    os.remove(r)
+            self.evictions += 1
+
+    def _guardar_stats(self, hit):
+        # Contadores acumulados entre procesos
+        ruta = os.path.join(self.cache_dir, "stats.json")
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {"hits": 0, "misses": 0}
+        stats["hits" if hit else "misses"] += 1
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entradas())}
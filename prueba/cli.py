@@ -0,0 +1,163 @@
+# cli.py
+"""
+Línea de comandos del sistema de inventario, por etapas.
+
+Cada subcomando importa solo lo que usa: `score` no carga owlrl, experta ni
+skfuzzy (usa el snapshot binario y el controlador compilado), `build` no carga
+owlrl, etc. Ver benchmarkArranque.py para el control del tiempo de arranque.
+
+Uso:
+    python prueba/cli.py build   [--salida ontologia.bin] [--historial historial_stock.bin]
+    python prueba/cli.py reason  [--perfil rdfs|lite|consulta] [--salida ontologia_final.bin] [--historial ...]
+    python prueba/cli.py score   [--grafo ontologia_final.bin]
+    python prueba/cli.py run     [--grafo ...] [--reglas original|filtrado|columnar] [--acciones a.jsonl]
+                                 [--perfilar [perfil_reglas.json]]
+    python prueba/cli.py export  [--grafo ...] [--formato ttl|bin] [--salida ontologia_final.ttl]
+    python prueba/cli.py demanda [--historial historial_stock.bin] [--ventana 30]
+"""
+import argparse
+import json
+import os
+import sys
+
+def _grafo_razonado(ruta):
+    # Snapshot binario si existe; si no, la caché de ontologías (razona si hace falta)
+    if ruta and os.path.exists(ruta):
+        from ontologia import load_binary
+        return load_binary(ruta)
+    from cacheOntologia import OntologyCache
+    return OntologyCache().get_or_build()[0]
+
+def _datos(args):
+    # Con --historial, nivelDemanda se deriva del historial de stock
+    from ontologia import default_data
+    datos = default_data()
+    if args.historial:
+        from historialStock import HistorialStock
+        if not os.path.exists(args.historial):
+            sys.exit(f"No existe el historial {args.historial}")
+        datos = HistorialStock(args.historial).aplicar_a(datos, ventana=args.ventana)
+    return datos
+
+def _indice(g):
+    from indiceProveedores import IndiceProveedores
+    from prueba.sistemaDifuso import obtener_controlador
+    return IndiceProveedores.desde_grafo(g, obtener_controlador())
+
+def cmd_build(args):
+    from ontologia import build_ontology, serialize_binary, serialize_turtle
+    g = build_ontology(_datos(args))
+    if args.salida.endswith(".ttl"):
+        serialize_turtle(g, args.salida)
+    else:
+        serialize_binary(g, args.salida)
+    print(f"Triples: {len(g)} -> {args.salida}")
+
+def cmd_reason(args):
+    from cacheOntologia import OntologyCache
+    from ontologia import serialize_binary
+    cache = OntologyCache()
+    g_after, inferred, n_before = cache.get_or_build(_datos(args), profile=args.perfil)
+    serialize_binary(g_after, args.salida)
+    print(f"Triples antes: {n_before} | después: {len(g_after)} | inferidos: {len(inferred)}")
+    print("Caché ontología:", cache.stats())
+
+def cmd_score(args):
+    indice = _indice(_grafo_razonado(args.grafo))
+    if args.top:
+        ranking = {c: indice.top(c, args.top) for c in [None, *indice.categorias()]}
+        print(json.dumps({c or "global": dict(r) for c, r in ranking.items()}, ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(indice.confiabilidad, ensure_ascii=False, indent=2))
+
+def cmd_run(args):
+    from translator import graph_to_facts, iter_facts
+    from prueba.sistemaInventario import crear_motor, ConsoleSink, JsonlSink
+
+    g = _grafo_razonado(args.grafo)
+    indice = _indice(g)
+    confi_map = indice.confiabilidad
+    sink = JsonlSink(args.acciones) if args.acciones else ConsoleSink()
+    if args.reglas == "columnar":
+        from motorColumnar import MotorColumnar
+        motor = MotorColumnar(sink=sink, indice=indice).cargar(iter_facts(g, confi_map))
+        motor.run()
+        return
+    engine = crear_motor(args.reglas, sink=sink, indice=indice, perfilar=bool(args.perfilar))
+    engine.reset()
+    graph_to_facts(g, engine, confi_map=confi_map)
+    engine.run()
+    print("Estadísticas:", engine.estadisticas, file=sys.stderr)
+    if args.perfilar:
+        print(engine.perfil.reporte(), file=sys.stderr)
+        print("Perfil por regla:", engine.perfil.exportar_json(args.perfilar), file=sys.stderr)
+
+def cmd_export(args):
+    from ontologia import serialize_turtle, serialize_binary
+    g = _grafo_razonado(args.grafo)
+    salida = args.salida or f"ontologia_final.{args.formato}"
+    if args.formato == "ttl":
+        serialize_turtle(g, salida)
+    else:
+        serialize_binary(g, salida)
+    print(f"Triples: {len(g)} -> {salida}")
+
+def cmd_demanda(args):
+    from historialStock import HistorialStock
+    if not os.path.exists(args.historial):
+        sys.exit(f"No existe el historial {args.historial}")
+    niveles = HistorialStock(args.historial).niveles_demanda(ventana=args.ventana)
+    print(json.dumps(niveles, ensure_ascii=False, indent=2))
+
+def _opciones_historial(p, requerido=False):
+    p.add_argument("--historial", default="historial_stock.bin" if requerido else None,
+                   help="historial de stock del que se deriva nivelDemanda")
+    p.add_argument("--ventana", type=float, default=30.0, help="días de la ventana de consumo")
+
+def construir_parser():
+    ap = argparse.ArgumentParser(prog="cli.py", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("build", help="construye la ontología (sin razonar)")
+    p.add_argument("--salida", default="ontologia.bin", help=".bin o .ttl")
+    _opciones_historial(p)
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("reason", help="cierre RDFS (con caché) y snapshot binario")
+    p.add_argument("--perfil", default="rdfs", choices=("rdfs", "lite", "consulta"),
+                   help="lite: solo lo que usan las reglas; consulta: sin materializar")
+    p.add_argument("--salida", default="ontologia_final.bin")
+    _opciones_historial(p)
+    p.set_defaults(func=cmd_reason)
+
+    p = sub.add_parser("score", help="confiabilidad difusa de los proveedores")
+    p.add_argument("--grafo", default="ontologia_final.bin")
+    p.add_argument("--top", type=int, default=0, help="ranking top-k por categoría")
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser("run", help="traduce el grafo y corre el motor de reglas")
+    p.add_argument("--grafo", default="ontologia_final.bin")
+    p.add_argument("--reglas", default="original", choices=("original", "filtrado", "columnar"))
+    p.add_argument("--acciones", default=None, help="archivo JSONL (por defecto, consola)")
+    p.add_argument("--perfilar", nargs="?", const="perfil_reglas.json", default=None, metavar="JSON",
+                   help="perfil por regla (reporte en stderr y JSON); no aplica a columnar")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("export", help="exporta el grafo razonado")
+    p.add_argument("--grafo", default="ontologia_final.bin")
+    p.add_argument("--formato", default="ttl", choices=("ttl", "bin"))
+    p.add_argument("--salida", default=None)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("demanda", help="niveles de demanda derivados del historial de stock")
+    _opciones_historial(p, requerido=True)
+    p.set_defaults(func=cmd_demanda)
+    return ap
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
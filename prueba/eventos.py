@@ -0,0 +1,101 @@
+# eventos.py
+"""
+Ingesta continua de eventos de stock/pedidos (JSONL) sobre un motor ya cargado.
+
+Uso:
+    python prueba/eventos.py [archivo.jsonl] [--seguir]
+Sin archivo lee de stdin; con --seguir queda esperando líneas nuevas (tail -f).
+"""
+import json
+import sys
+import time
+
+def _avisar(mensaje):
+    print(f"eventos: {mensaje}", file=sys.stderr)
+
+def leer_eventos(fuente, seguir=False, espera=0.5):
+    """
+    Genera dicts a partir de un archivo JSONL; con seguir=True no termina en EOF.
+    Las líneas que no son un objeto JSON se informan por stderr y se saltean.
+    """
+    n_linea = 0
+    while True:
+        linea = fuente.readline()
+        if not linea:
+            if not seguir:
+                return
+            time.sleep(espera)
+            continue
+        n_linea += 1
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            evento = json.loads(linea)
+        except ValueError as e:
+            _avisar(f"línea {n_linea} ignorada (JSON inválido: {e})")
+            continue
+        if not isinstance(evento, dict):
+            _avisar(f"línea {n_linea} ignorada (no es un objeto)")
+            continue
+        yield evento
+
+def procesar_eventos(engine, eventos, tam_lote=1, estricto=False):
+    """
+    Aplica los eventos al motor (modify/retract de los hechos afectados) y
+    corre la agenda cada `tam_lote` eventos. Devuelve la cantidad procesada.
+    Un evento inválido (tipo desconocido, campos faltantes o mal tipados) se
+    informa por stderr y se saltea; con estricto=True se propaga el error.
+    """
+    n = 0
+    for evento in eventos:
+        try:
+            engine.aplicar_evento(evento)
+        except (KeyError, ValueError, TypeError) as e:
+            if estricto:
+                raise
+            _avisar(f"evento ignorado {evento!r}: {e!r}")
+            continue
+        n += 1
+        if n % tam_lote == 0:
+            engine.run()
+    if n % tam_lote:
+        engine.run()
+    return n
+
+def simular(instantanea, eventos, sink=None):
+    """
+    Corrida "what-if": bifurca un motor desde la instantánea (sin volver a
+    declarar el catálogo), le aplica los eventos y devuelve el motor resultante.
+    """
+    from prueba.sistemaInventario import ListSink
+    engine = instantanea.restaurar(sink if sink is not None else ListSink())
+    eventos = list(eventos)
+    procesar_eventos(engine, eventos, tam_lote=max(len(eventos), 1), estricto=True)
+    return engine
+
+def motor_inicial():
+    # Carga única: ontología razonada (desde caché) → hechos → primera corrida
+    from cacheOntologia import OntologyCache
+    from translator import graph_to_facts
+    from prueba.sistemaInventario import InventarioExpertSystem
+
+    g_after, _, _ = OntologyCache().get_or_build()
+    engine = InventarioExpertSystem()
+    engine.reset()
+    graph_to_facts(g_after, engine)
+    engine.run()
+    return engine
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    seguir = "--seguir" in sys.argv
+    engine = motor_inicial()
+    fuente = open(args[0], encoding="utf-8") if args else sys.stdin
+    try:
+        procesar_eventos(engine, leer_eventos(fuente, seguir=seguir))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if fuente is not sys.stdin:
+            fuente.close()
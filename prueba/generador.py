@@ -0,0 +1,60 @@
+# generador.py
+"""Generador reproducible de catálogos grandes con el formato de default_data()."""
+import random
+
+CATEGORIAS_BASE = ["Perecedero", "NoPerecedero", "Critico"]
+NIVELES_DEMANDA = ["Alta", "Media", "Baja"]
+
+def generar_datos(n_productos=1000, n_proveedores=50, n_categorias=3, n_pedidos=None,
+                  frac_preferidos=0.1, semilla=0):
+    """
+    Devuelve un dict como default_data() con la cantidad pedida de productos,
+    proveedores, categorías y pedidos. Misma semilla ⇒ mismos datos.
+    Las primeras categorías son las del esquema (Perecedero, NoPerecedero,
+    Critico); si se piden más se agregan Categoria_4, Categoria_5, ...
+    """
+    # Cada producto necesita un proveedor asignado (ver add_instances)
+    if n_proveedores < 1:
+        raise ValueError(f"n_proveedores debe ser al menos 1 (se pidió {n_proveedores})")
+    rnd = random.Random(semilla)
+    if n_pedidos is None:
+        n_pedidos = n_productos // 2
+
+    categorias = CATEGORIAS_BASE[:n_categorias] + [
+        f"Categoria_{i}" for i in range(len(CATEGORIAS_BASE) + 1, n_categorias + 1)]
+    productos = [f"Producto_{i}" for i in range(1, n_productos + 1)]
+    proveedores = {f"Proveedor_{i}": {"lead": rnd.randint(0, 15), "calidad": rnd.randint(0, 10)}
+                   for i in range(1, n_proveedores + 1)}
+    nombres_prov = list(proveedores)
+    n_pref = max(1, int(n_proveedores * frac_preferidos))
+
+    return {
+        "productos": productos,
+        "categorias": {p: rnd.choice(categorias) for p in productos},
+        "demandas": {p: rnd.choice(NIVELES_DEMANDA) for p in productos},
+        "proveedores": proveedores,
+        "proveedores_preferidos": nombres_prov[:n_pref],
+        "stocks": {p: rnd.choice((0, rnd.randint(1, 9), rnd.randint(10, 80))) for p in productos},
+        "asignacion_prov": {p: rnd.choice(nombres_prov) for p in productos},
+        "pedidos": [(rnd.choice(productos), rnd.randint(1, 40)) for _ in range(n_pedidos)],
+    }
+
+# Consumo diario medio según el nivel de demanda de los datos (unidades/día)
+_CONSUMO_POR_NIVEL = {"Alta": 8.0, "Media": 3.0, "Baja": 0.5}
+
+def generar_historial(historial, datos, dias=90, por_dia=1, semilla=0):
+    """
+    Llena un HistorialStock con `dias` de snapshots por producto (`por_dia`
+    lecturas diarias). El consumo sigue el nivel de demanda de `datos` con ruido
+    y se repone al bajar de 5 unidades, así los niveles derivados son comparables.
+    """
+    import numpy as np
+    rng = np.random.default_rng(semilla)
+    productos = datos["productos"]
+    media = np.array([_CONSUMO_POR_NIVEL[datos["demandas"][p]] for p in productos]) / por_dia
+    stock = np.array([max(datos["stocks"][p], 0) for p in productos], dtype=np.int64) + 40
+    for paso in range(dias * por_dia):
+        historial.agregar_lote(productos, paso / por_dia, stock)
+        stock = np.maximum(stock - rng.poisson(media), 0)
+        stock[stock < 5] += 60
+    return historial
@@ -0,0 +1,175 @@
+# historialStock.py
+"""
+Historial de stock por producto, fuera del grafo RDF.
+
+Cada StockSnapshot es un registro fijo (producto, cantidad, t) en un archivo
+con memmap de NumPy: agregar es O(1) amortizado (la capacidad se duplica al
+llenarse) y las estadísticas por ventana (consumo, velocidad, reposiciones) se
+calculan para todos los productos en una sola pasada vectorizada. De ahí sale
+nivelDemanda, sin cargar años de historia como triples.
+
+Archivos: <ruta> (cabecera + registros) y <ruta>.productos (un nombre por línea,
+el id de cada producto es su número de línea).
+"""
+import os
+import struct
+
+import numpy as np
+
+NIVELES_DEMANDA = ("Baja", "Media", "Alta")
+
+_MAGIC = b"HISTSTK1"
+_CABECERA = struct.Struct("<8sQQ")   # magic, registros usados, capacidad
+_TAM_CABECERA = 32                    # múltiplo de 8: los registros quedan alineados
+_REGISTRO = np.dtype([("producto", "<u4"), ("cantidad", "<i4"), ("t", "<f8")])
+
+class HistorialStock:
+    """Serie temporal de snapshots de stock, de solo agregado (t en días)."""
+
+    def __init__(self, ruta="historial_stock.bin", capacidad=1024):
+        self.ruta = ruta
+        self._ruta_productos = ruta + ".productos"
+        self.productos, self._ids = [], {}
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                magic, self._n, capacidad = _CABECERA.unpack(f.read(_CABECERA.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{ruta} no es un historial de stock")
+            if os.path.exists(self._ruta_productos):
+                with open(self._ruta_productos, encoding="utf-8") as f:
+                    self.productos = f.read().splitlines()
+                self._ids = {p: i for i, p in enumerate(self.productos)}
+        else:
+            self._n = 0
+            with open(ruta, "wb") as f:
+                f.write(_CABECERA.pack(_MAGIC, 0, capacidad).ljust(_TAM_CABECERA, b"\0"))
+                f.truncate(_TAM_CABECERA + capacidad * _REGISTRO.itemsize)
+            open(self._ruta_productos, "w", encoding="utf-8").close()
+        # Queda abierto: los productos nuevos de cada agregado se escriben de una vez
+        self._nombres_nuevos = False
+        self._archivo_productos = open(self._ruta_productos, "a", encoding="utf-8")
+        self._mapear(capacidad)
+
+    def _mapear(self, capacidad):
+        self.capacidad = capacidad
+        self._cabecera = np.memmap(self.ruta, dtype="<u8", mode="r+", shape=(3,))
+        self._datos = np.memmap(self.ruta, dtype=_REGISTRO, mode="r+",
+                                offset=_TAM_CABECERA, shape=(capacidad,))
+
+    def _crecer(self, minimo):
+        capacidad = max(2 * self.capacidad, minimo)
+        self.flush()
+        del self._datos, self._cabecera
+        with open(self.ruta, "r+b") as f:
+            f.truncate(_TAM_CABECERA + capacidad * _REGISTRO.itemsize)
+        self._mapear(capacidad)
+        self._cabecera[2] = capacidad
+
+    def _id(self, producto):
+        i = self._ids.get(producto)
+        if i is None:
+            i = self._ids[producto] = len(self.productos)
+            self.productos.append(producto)
+            self._archivo_productos.write(producto + "\n")
+            self._nombres_nuevos = True
+        return i
+
+    def _confirmar(self, n):
+        # Los nombres se vacían antes de publicar el contador: un registro nunca
+        # apunta a un producto que no esté en el archivo lateral
+        if self._nombres_nuevos:
+            self._archivo_productos.flush()
+            self._nombres_nuevos = False
+        self._n = n
+        self._cabecera[1] = n
+
+    def __len__(self):
+        return self._n
+
+    def agregar(self, producto, t, cantidad):
+        """Agrega un snapshot (O(1) amortizado)."""
+        if self._n == self.capacidad:
+            self._crecer(self._n + 1)
+        self._datos[self._n] = (self._id(producto), cantidad, t)
+        self._confirmar(self._n + 1)
+
+    def agregar_lote(self, productos, t, cantidades):
+        """Agrega varios snapshots de una vez; t puede ser un escalar."""
+        ids = np.fromiter((self._id(p) for p in productos), dtype=np.uint32, count=len(productos))
+        fin = self._n + len(ids)
+        if fin > self.capacidad:
+            self._crecer(fin)
+        nuevos = self._datos[self._n:fin]
+        nuevos["producto"] = ids
+        nuevos["cantidad"] = cantidades
+        nuevos["t"] = t
+        self._confirmar(fin)
+
+    def registros(self):
+        """Vista (sin copia) de los registros usados."""
+        return self._datos[:self._n]
+
+    def flush(self):
+        self._archivo_productos.flush()
+        self._datos.flush()
+        self._cabecera.flush()
+
+    def cerrar(self):
+        self.flush()
+        self._archivo_productos.close()
+        del self._datos, self._cabecera
+
+    def estadisticas(self, ventana=30.0, t_fin=None):
+        """
+        Por producto (arreglos alineados con self.productos), sobre los pares de
+        snapshots consecutivos dentro de [t_fin - ventana, t_fin]:
+        - consumo: suma de las bajas de stock (las subas son reposiciones)
+        - tiempo: días cubiertos por esos pares
+        - velocidad: consumo / tiempo (0 si no hay pares)
+        - reposiciones: cantidad de subas
+        """
+        r = self.registros()
+        n_prod = len(self.productos)
+        if len(r) < 2:
+            ceros = np.zeros(n_prod)
+            return {"consumo": ceros, "tiempo": ceros, "velocidad": ceros, "reposiciones": ceros}
+        orden = np.lexsort((r["t"], r["producto"]))
+        prod, t = r["producto"][orden], r["t"][orden]
+        cant = r["cantidad"][orden].astype(np.int64)
+        if t_fin is None:
+            t_fin = float(t.max())
+        par = ((prod[1:] == prod[:-1]) & (t[:-1] >= t_fin - ventana) & (t[1:] <= t_fin))
+        destino = prod[1:][par]
+        delta = (cant[:-1] - cant[1:])[par]
+        consumo = np.bincount(destino, weights=np.clip(delta, 0, None), minlength=n_prod)
+        tiempo = np.bincount(destino, weights=(t[1:] - t[:-1])[par], minlength=n_prod)
+        reposiciones = np.bincount(destino, weights=delta < 0, minlength=n_prod)
+        velocidad = np.divide(consumo, tiempo, out=np.zeros(n_prod), where=tiempo > 0)
+        return {"consumo": consumo, "tiempo": tiempo, "velocidad": velocidad,
+                "reposiciones": reposiciones}
+
+    def niveles_demanda(self, ventana=30.0, umbrales=None, t_fin=None):
+        """
+        producto -> "Alta"/"Media"/"Baja" según la velocidad de consumo en la
+        ventana, para los productos con historia en ella. umbrales=(media, alta)
+        en unidades/día; por defecto, los terciles de las velocidades observadas.
+        Una velocidad igual a un umbral queda en el nivel de abajo, así que sin
+        consumo siempre es "Baja" (aunque los terciles sean 0).
+        """
+        est = self.estadisticas(ventana, t_fin)
+        con_datos = est["tiempo"] > 0
+        if not con_datos.any():
+            return {}
+        velocidad = est["velocidad"][con_datos]
+        if umbrales is None:
+            umbrales = np.quantile(velocidad, [1 / 3, 2 / 3])
+        niveles = np.searchsorted(np.asarray(umbrales, dtype=float), velocidad, side="left")
+        nombres = np.asarray(self.productos, dtype=object)[con_datos]
+        return {p: NIVELES_DEMANDA[k] for p, k in zip(nombres, niveles.tolist())}
+
+    def aplicar_a(self, datos, ventana=30.0, umbrales=None):
+        """Copia de `datos` (formato default_data) con las demandas derivadas del historial."""
+        niveles = self.niveles_demanda(ventana, umbrales)
+        demandas = dict(datos["demandas"])
+        demandas.update({p: niveles[p] for p in datos["productos"] if p in niveles})
+        return dict(datos, demandas=demandas)
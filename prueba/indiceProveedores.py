@@ -0,0 +1,163 @@
+# indiceProveedores.py
+"""
+Índice de proveedores ordenados por confiabilidad (sistema difuso), por categoría
+de producto y global. Cada ranking es una lista ordenada de (-confiabilidad, nombre)
+mantenida con bisect: top-k y "mejor alternativa" salen del frente de la lista, y
+un cambio de leadTimeDias/calidad re-puntúa solo a ese proveedor y lo reubica.
+"""
+import bisect
+
+from rdflib.namespace import FOAF
+from ontologia import BASE, suppliers
+
+# Por debajo de este valor un proveedor se considera poco confiable (0..10)
+UMBRAL_POCO_CONFIABLE = 4.0
+
+def _frente(ranking, quitar, poner):
+    # Los dos primeros del ranking si se reemplaza `quitar` por `poner` (sin tocarlo)
+    return sorted([e for e in ranking[:3] if e != quitar] + [poner])[:2]
+
+class IndiceProveedores:
+    def __init__(self, controlador, umbral=UMBRAL_POCO_CONFIABLE):
+        self.controlador = controlador
+        self.umbral = umbral
+        self.confiabilidad = {}          # nombre -> valor
+        self.entradas = {}               # nombre -> (lead, calidad)
+        self.categorias_producto = {}    # producto -> [categoría]
+        self.productos_proveedor = {}    # proveedor -> {producto}
+        self.proveedores_producto = {}   # producto -> {proveedor}
+        self.productos_categoria = {}    # categoría -> {producto con proveedor}
+        self.categorias_proveedor = {}   # proveedor -> {categoría}
+        self._rankings = {None: []}      # categoría (None = global) -> [(-conf, nombre)]
+
+    @classmethod
+    def desde_grafo(cls, g, controlador, confi_map=None, umbral=UMBRAL_POCO_CONFIABLE):
+        """
+        Arma el índice desde el grafo razonado: proveedores con lead/calidad y las
+        categorías que atienden (por los productos que les están asignados).
+        confi_map opcional evita volver a puntuar lo ya calculado.
+        """
+        indice = cls(controlador, umbral)
+        nombres, leads, cals = [], [], []
+        for prov in suppliers(g):
+            nombre, lead, cal = (g.value(prov, FOAF.name), g.value(prov, BASE.leadTimeDias),
+                                 g.value(prov, BASE.calidad))
+            if nombre is not None and lead is not None and cal is not None:
+                nombres.append(str(nombre))
+                leads.append(int(lead.toPython()))
+                cals.append(int(cal.toPython()))
+        if confi_map is None or any(n not in confi_map for n in nombres):
+            valores = controlador.evaluar_batch(leads, cals) if nombres else []
+        else:
+            valores = [confi_map[n] for n in nombres]
+        for n, lead, cal, v in zip(nombres, leads, cals, valores):
+            indice.entradas[n] = (lead, cal)
+            indice.confiabilidad[n] = float(v)
+
+        # proveedorPrincipal ⊑ tieneProveedor: se leen ambas para no depender del cierre
+        productos = {}
+        for pred in (BASE.tieneProveedor, BASE.proveedorPrincipal):
+            for pr, prov in g.subject_objects(pred):
+                productos.setdefault(pr, {})[prov] = None
+        for pr, provs in productos.items():
+            nombre_pr = g.value(pr, FOAF.name) or g.value(pr, BASE.nombre)
+            if nombre_pr is None:
+                continue
+            cats = [c.split("#")[-1] for c in g.objects(pr, BASE.perteneceACategoria)]
+            indice.categorias_producto[str(nombre_pr)] = cats
+            for prov in provs:
+                n = g.value(prov, FOAF.name)
+                if n is not None and str(n) in indice.confiabilidad:
+                    indice.asignar(str(n), str(nombre_pr), cats)
+        for n, v in indice.confiabilidad.items():
+            bisect.insort(indice._rankings[None], (-v, n))
+        return indice
+
+    def asignar(self, proveedor, producto, categorias):
+        """Registra que `proveedor` abastece `producto` (y sus categorías)."""
+        self.productos_proveedor.setdefault(proveedor, set()).add(producto)
+        self.proveedores_producto.setdefault(producto, set()).add(proveedor)
+        for cat in categorias:
+            self.productos_categoria.setdefault(cat, set()).add(producto)
+        nuevas = set(categorias) - self.categorias_proveedor.setdefault(proveedor, set())
+        for cat in nuevas:
+            self.categorias_proveedor[proveedor].add(cat)
+            bisect.insort(self._rankings.setdefault(cat, []), (-self.confiabilidad[proveedor], proveedor))
+
+    def categorias(self):
+        return sorted(c for c in self._rankings if c is not None)
+
+    def top(self, categoria=None, k=3):
+        """Los k proveedores más confiables de la categoría (None = todos)."""
+        return [(n, -v) for v, n in self._rankings.get(categoria, [])[:k]]
+
+    def poco_confiable(self, proveedor):
+        return self.confiabilidad.get(proveedor, 0.0) < self.umbral
+
+    def alternativa(self, producto, actual):
+        """
+        Mejor proveedor que supere al actual: primero entre los que atienden las
+        categorías del producto, si no hay, en el ranking global. None si el actual
+        ya es el mejor.
+        """
+        propio = self.confiabilidad.get(actual, float("-inf"))
+        for cats in (self.categorias_producto.get(producto, ()), (None,)):
+            mejor = None
+            for cat in cats:
+                for v, n in self._rankings.get(cat, ()):
+                    if n != actual:
+                        if -v > propio and (mejor is None or (v, n) < mejor):
+                            mejor = (v, n)
+                        break
+            if mejor is not None:
+                return mejor[1]
+        return None
+
+    def recomendaciones(self, productos=None):
+        """
+        (producto, proveedor) -> (poco_confiable, alternativa) para todo lo asignado
+        (o solo para los productos pedidos).
+        """
+        if productos is None:
+            productos = self.proveedores_producto
+        return {(p, n): (self.poco_confiable(n), self.alternativa(p, n))
+                for p in productos for n in self.proveedores_producto.get(p, ())}
+
+    def actualizar_proveedor(self, proveedor, lead=None, calidad=None):
+        """
+        Re-puntúa un proveedor tras cambiar su leadTimeDias/calidad y lo reubica en
+        sus rankings. Devuelve los productos cuya recomendación cambió.
+        Solo se recalculan los productos del proveedor y los de las categorías
+        cuyo frente de ranking se movió: alternativa() mira a lo sumo los dos
+        primeros de cada ranking, así que el resto no puede cambiar.
+        """
+        lead_ant, cal_ant = self.entradas.get(proveedor, (None, None))
+        lead = lead_ant if lead is None else lead
+        calidad = cal_ant if calidad is None else calidad
+        if lead is None or calidad is None:
+            raise KeyError(f"Proveedor sin leadTimeDias/calidad: {proveedor}")
+        nuevo = float(self.controlador.evaluar(lead, calidad))
+        anterior = self.confiabilidad.get(proveedor)
+        viejo = None if anterior is None else (-anterior, proveedor)
+        cats = (None, *self.categorias_proveedor.get(proveedor, ()))
+        movidos = [cat for cat in cats
+                   if _frente(self._rankings.get(cat, []), viejo, (-nuevo, proveedor))
+                   != self._rankings.get(cat, [])[:2]]
+        if None in movidos:
+            revisar = self.proveedores_producto  # el ranking global respalda a todos
+        else:
+            revisar = set(self.productos_proveedor.get(proveedor, ()))
+            for cat in movidos:
+                revisar.update(self.productos_categoria.get(cat, ()))
+        antes = self.recomendaciones(revisar)
+        for cat in cats:
+            ranking = self._rankings.setdefault(cat, [])
+            if viejo is not None:
+                i = bisect.bisect_left(ranking, viejo)
+                if i < len(ranking) and ranking[i] == viejo:
+                    del ranking[i]
+            bisect.insort(ranking, (-nuevo, proveedor))
+        self.entradas[proveedor] = (lead, calidad)
+        self.confiabilidad[proveedor] = nuevo
+        despues = self.recomendaciones(revisar)
+        return {p for (p, n), rec in despues.items() if antes.get((p, n)) != rec}
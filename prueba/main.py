@@ -1,40 +1,69 @@
 # main.py 
-from ontologia import build_ontology, reason_and_compare, serialize_turtle
-from prueba.sistemaDifuso import build_fuzzy_system, eval_confiabilidad
+import os
+from ontologia import serialize_turtle, serialize_binary, default_data
+from cacheOntologia import OntologyCache
+from metricas import Metricas
+from prueba.sistemaDifuso import obtener_controlador
 from prueba.sistemaInventario import InventarioExpertSystem
 from translator import graph_to_facts
 from rdflib.namespace import FOAF
-from ontologia import BASE
+from ontologia import BASE, suppliers
+from indiceProveedores import IndiceProveedores
+from historialStock import HistorialStock
 
-# 1) Ontología + razonamiento
-g = build_ontology()
-g_before, g_after, inferred = reason_and_compare(g)
-print(f"Triples antes: {len(g_before)} | después: {len(g_after)} | inferidos: {len(inferred)}")
+metricas = Metricas()
+
+# 1) Ontología + razonamiento (caché en disco por hash de los datos y el perfil)
+datos = default_data()
+if os.path.exists("historial_stock.bin"):
+    # nivelDemanda sale del historial de stock (los productos sin historia quedan igual)
+    datos = HistorialStock("historial_stock.bin").aplicar_a(datos)
+cache = OntologyCache()
+g_after, inferred, n_before = cache.get_or_build(datos, metricas=metricas)
+print(f"Triples antes: {n_before} | después: {len(g_after)} | inferidos: {len(inferred)}")
+print("Caché ontología:", cache.stats())
+metricas.fijar("triples_inferidos", len(inferred))
+metricas.fijar("triples_totales", len(g_after))
 # (Para el PDF, imprime 4+ ejemplos)
 ejemplos = list(inferred)[:6]
 for t in ejemplos:
     print("INF:", t)
-serialize_turtle(g_after, "ontologia_final.ttl")
+with metricas.fase("serializacion"):
+    serialize_turtle(g_after, "ontologia_final.ttl")     # exportación legible
+    serialize_binary(g_after, "ontologia_final.bin")     # snapshot rápido (load_binary)
 
 # 2) Lógica Difusa → calcular confiabilidad por proveedor (desde ontología)
-retraso, calidad, confiabilidad, sim = build_fuzzy_system()
-confi_map = {}
-for prov in g_after.subjects(None, None):
-    # detecta proveedores por tipo
-    if (prov, None, None) in g_after and ((prov, None, BASE.Proveedor) in g_after or (prov, None, BASE.ProveedorPreferido) in g_after):
+with metricas.fase("fuzzy_scoring"):
+    controlador = obtener_controlador()  # compilado una vez y reutilizado desde disco
+    nombres, leads, cals = [], [], []
+    for prov in suppliers(g_after):
+        # proveedores por tipo (índice clase → instancias, incluye ProveedorPreferido)
         nombre = g_after.value(prov, FOAF.name)
         lead = g_after.value(prov, BASE.leadTimeDias)
         cal = g_after.value(prov, BASE.calidad)
         if nombre and lead and cal:
-            conf = eval_confiabilidad(sim, int(lead.toPython()), int(cal.toPython()))
-            confi_map[str(nombre)] = conf
+            nombres.append(str(nombre))
+            leads.append(int(lead.toPython()))
+            cals.append(int(cal.toPython()))
+    # Evaluación en lote (una sola pasada vectorizada en vez de compute() por proveedor)
+    confs = controlador.evaluar_batch(leads, cals) if nombres else []
+    confi_map = {n: float(v) for n, v in zip(nombres, confs)}
 print("Confiabilidades difusas:", confi_map)
+metricas.fijar("proveedores_puntuados", len(confi_map))
+# Ranking por categoría: lo usan cambiar_proveedor / proveedor_alternativo
+indice = IndiceProveedores.desde_grafo(g_after, controlador, confi_map)
 
 # 3) Traducir todo el grafo razonado → hechos Experta + inyectar confiabilidad
-engine = InventarioExpertSystem()
-engine.reset()
-graph_to_facts(g_after, engine, confi_map=confi_map)
+engine = InventarioExpertSystem(indice=indice)
+with metricas.fase("traduccion"):
+    engine.reset()
+    graph_to_facts(g_after, engine, confi_map=confi_map)
 
 # 4) Ejecutar motor
-engine.run()
+with metricas.fase("engine_run"):
+    engine.run()
 
+for nombre, valor in engine.estadisticas.items():
+    metricas.fijar(nombre, valor)
+metricas.exportar_json("metricas.json")
+metricas.exportar_prometheus("metricas.prom")
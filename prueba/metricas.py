@@ -0,0 +1,71 @@
+# metricas.py
+"""Instrumentación por fase del pipeline: tiempos, CPU, RSS pico y contadores."""
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def rss_pico_bytes():
+    """RSS máximo del proceso hasta ahora (None si la plataforma no lo expone)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024  # Linux informa KiB
+
+class Metricas:
+    def __init__(self, prefijo="inventario"):
+        self.prefijo = prefijo
+        self.fases = {}
+        self.contadores = {}
+
+    @contextmanager
+    def fase(self, nombre):
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            previa = self.fases.get(nombre, {"segundos": 0.0, "cpu_segundos": 0.0})
+            self.fases[nombre] = {
+                "segundos": previa["segundos"] + time.perf_counter() - t0,
+                "cpu_segundos": previa["cpu_segundos"] + time.process_time() - c0,
+                "rss_pico_bytes": rss_pico_bytes(),
+            }
+
+    def contar(self, nombre, n=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def fijar(self, nombre, valor):
+        self.contadores[nombre] = valor
+
+    def como_dict(self):
+        return {"fases": self.fases, "contadores": self.contadores}
+
+    def exportar_json(self, path="metricas.json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.como_dict(), f, indent=2)
+        return path
+
+    def exportar_prometheus(self, path="metricas.prom"):
+        """Formato de texto de Prometheus (para node_exporter textfile, por ejemplo)."""
+        p = self.prefijo
+        lineas = []
+        series = (("fase_segundos", "segundos", "Tiempo de pared por fase"),
+                  ("fase_cpu_segundos", "cpu_segundos", "Tiempo de CPU por fase"),
+                  ("fase_rss_pico_bytes", "rss_pico_bytes", "RSS pico del proceso al cerrar la fase"))
+        for metrica, campo, ayuda in series:
+            lineas.append(f"# HELP {p}_{metrica} {ayuda}")
+            lineas.append(f"# TYPE {p}_{metrica} gauge")
+            for fase, valores in self.fases.items():
+                if valores.get(campo) is not None:
+                    lineas.append(f'{p}_{metrica}{{fase="{fase}"}} {valores[campo]}')
+        for nombre, valor in self.contadores.items():
+            lineas.append(f"# TYPE {p}_{nombre} gauge")
+            lineas.append(f"{p}_{nombre} {valor}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+        return path
@@ -0,0 +1,161 @@
+# motorColumnar.py
+"""
+Camino rápido columnar para las reglas de InventarioExpertSystem.
+
+Todas las reglas miran un hecho Stock y, como mucho, un hecho más del mismo
+producto (Demanda, Categoria o Proveedor) con un umbral sobre la cantidad.
+Acá los hechos se cargan en arreglos NumPy y cada regla se evalúa como una
+máscara sobre la tabla Stock o sobre la tabla unida por producto.
+Produce las mismas acciones que el motor experta (mismas reglas, mensajes y
+retracciones de stock_agotado / evitar_duplicados), ordenadas por salience,
+seguidas de la asignación agregada de pedidos (ver asignacionPedidos.py).
+"""
+import numpy as np
+
+from prueba.asignacionPedidos import asignar_pedidos
+from prueba.sistemaInventario import (InventarioExpertSystem, Stock, Demanda, Proveedor, Pedido,
+                                      Categoria, ConsoleSink, construir_accion, Rule,
+                                      proveedor_poco_confiable, proveedor_alternativa)
+
+def _salience(regla):
+    r = vars(InventarioExpertSystem)[regla]
+    return r.salience if isinstance(r, Rule) else 0
+
+class MotorColumnar:
+    def __init__(self, sink=None, indice=None):
+        self.sink = sink if sink is not None else ConsoleSink()
+        self.indice = indice
+        self.reset()
+
+    def reset(self):
+        self._stock = ([], [])                      # producto, cantidad
+        self._unidos = {Demanda: ([], []), Categoria: ([], []),
+                        Proveedor: ([], []), Pedido: ([], [])}
+        self._vistos = set()
+
+    def cargar(self, hechos):
+        """Carga (Clase, campos) como los de translator.iter_facts."""
+        for clase, campos in hechos:
+            # Igual que experta: un hecho repetido se declara una sola vez (los
+            # Pedido traen su id, así que dos pedidos iguales no se confunden)
+            clave = (clase, tuple(sorted(campos.items())))
+            if clave in self._vistos:
+                continue
+            self._vistos.add(clave)
+            if clase is Stock:
+                self._stock[0].append(campos["producto"])
+                self._stock[1].append(campos["cantidad"])
+            elif clase in self._unidos:
+                col = self._unidos[clase]
+                col[0].append(campos["producto"])
+                col[1].append(campos["cantidad"] if clase is Pedido else
+                              campos["nivel"] if clase is Demanda else campos["nombre"])
+        return self
+
+    def _tablas(self):
+        prod = np.asarray(self._stock[0], dtype=object)
+        cant = np.asarray(self._stock[1], dtype=np.int64)
+        fila = {}
+        for i, p in enumerate(self._stock[0]):
+            fila.setdefault(p, []).append(i)
+        unidos = {}
+        for clase, (productos, valores) in self._unidos.items():
+            if clase is Pedido:
+                continue  # los pedidos van agregados por producto (_asignar)
+            # Une cada hecho con todas las filas Stock del mismo producto
+            izq, der = [], []
+            for j, p in enumerate(productos):
+                for i in fila.get(p, ()):
+                    izq.append(i)
+                    der.append(j)
+            idx_stock = np.asarray(izq, dtype=np.intp)
+            vals = np.asarray(valores, dtype=object)
+            unidos[clase] = (idx_stock, vals[np.asarray(der, dtype=np.intp)] if der else vals[:0])
+        return prod, cant, unidos
+
+    def evaluar(self):
+        """Devuelve la lista de acciones (dicts) en orden de salience."""
+        prod, cant, unidos = self._tablas()
+        # Retracciones: c < 0 (salience 100) y c == 0 (salience 50) sacan el Stock
+        # antes de que se disparen las reglas de menor salience.
+        vivo = cant > 0
+        acciones = []
+
+        def emitir(regla, mascara, idx=None, variante=None, extra=None):
+            # extra: {campo: columna alineada con la máscara}
+            filas = np.flatnonzero(mascara)
+            sal = _salience(regla)
+            for k in filas:
+                i = k if idx is None else idx[k]
+                kw = {} if extra is None else {n: _py(col[k]) for n, col in extra.items()}
+                acciones.append((sal, construir_accion(regla, prod[i], int(cant[i]), variante, **kw)))
+
+        emitir("evitar_duplicados", cant < 0)
+        emitir("stock_agotado", cant == 0)
+        emitir("reponer_urgente", vivo & (cant < 5))
+        emitir("reponer_pronto", vivo & (cant >= 5) & (cant < 10))
+        emitir("sobrestock", vivo & (cant >= 50))
+
+        i_d, nivel = unidos[Demanda]
+        c_d, v_d = cant[i_d], vivo[i_d]
+        emitir("alta_demanda_bajo_stock", v_d & (nivel == "Alta") & (c_d < 20), i_d)
+        emitir("baja_demanda_alto_stock", v_d & (nivel == "Baja") & (c_d > 30), i_d)
+        emitir("demanda_media", v_d & (nivel == "Media") & (c_d < 10), i_d)
+
+        i_c, cat = unidos[Categoria]
+        c_c, v_c = cant[i_c], vivo[i_c]
+        emitir("sobrestock_perecedero", v_c & (cat == "Perecedero") & (c_c > 30), i_c)
+        emitir("no_perecedero_critico", v_c & (cat == "NoPerecedero") & (c_c < 5), i_c)
+        emitir("producto_critico", v_c & (cat == "Crítico") & (c_c < 10), i_c)
+
+        i_p, prov = unidos[Proveedor]
+        c_p, v_p = cant[i_p], vivo[i_p]
+        # Confiabilidad y alternativa se consultan una vez por proveedor / por fila candidata
+        nombres, inv = np.unique(prov.astype(str), return_inverse=True) if len(prov) else ([], [])
+        poco = np.array([proveedor_poco_confiable(self.indice, n) for n in nombres], dtype=bool)[inv] \
+            if len(prov) else np.zeros(0, dtype=bool)
+        alt = np.full(len(prov), None, dtype=object)
+        for k in np.flatnonzero(v_p & (c_p < 10)):
+            alt[k] = proveedor_alternativa(self.indice, prod[i_p[k]], prov[k])
+        tiene_alt = alt != None  # noqa: E711 (comparación elemento a elemento)
+        cambio = v_p & poco & (c_p < 10)
+        if self.indice is None:
+            emitir("cambiar_proveedor", cambio, i_p, extra={"proveedor": prov})
+        else:
+            emitir("cambiar_proveedor", cambio & ~tiene_alt, i_p, extra={"proveedor": prov})
+            emitir("cambiar_proveedor", cambio & tiene_alt, i_p, "alternativa",
+                   {"proveedor": prov, "alternativa": alt})
+        emitir("proveedor_alternativo", v_p & (c_p < 5) & tiene_alt, i_p,
+               extra={"proveedor": prov, "alternativa": alt})
+
+        acciones.sort(key=lambda t: -t[0])  # sort estable
+        return [a for _, a in acciones] + self._asignar(prod, cant, vivo)
+
+    def _asignar(self, prod, cant, vivo):
+        # Igual que InventarioExpertSystem.asignar_pedidos: el Stock retractado cuenta como 0
+        stocks = {}
+        for p, c in zip(prod[vivo], cant[vivo]):
+            stocks.setdefault(p, int(c))
+        productos, cantidades = self._unidos[Pedido]
+        pedidos = [(p, int(q), edad) for edad, (p, q) in enumerate(zip(productos, cantidades))]
+        categorias = {}
+        for p, nombre in zip(*self._unidos[Categoria]):
+            categorias.setdefault(p, []).append(nombre)
+        demandas = {}
+        for p, nivel in zip(*self._unidos[Demanda]):
+            demandas.setdefault(p, nivel)
+        return [construir_accion("asignar_pedidos", d["producto"], d["stock"],
+                                 "faltante" if d["faltante"] else "cubre", pedidos=d["pedidos"],
+                                 total_pedido=d["total_pedido"], asignado=d["asignado"],
+                                 faltante=d["faltante"])
+                for d in asignar_pedidos(pedidos, stocks, categorias, demandas)]
+
+    def run(self):
+        acciones = self.evaluar()
+        for a in acciones:
+            self.sink.emit(a)
+        self.sink.flush()
+        return acciones
+
+def _py(v):
+    return v.item() if isinstance(v, np.generic) else v
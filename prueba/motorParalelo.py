@@ -0,0 +1,78 @@
+# motorParalelo.py
+"""
+Ejecución del sistema experto repartida por producto entre varios procesos.
+
+Todas las reglas de InventarioExpertSystem se unen solo por `producto`, así que
+los hechos de un mismo producto se mandan al mismo shard (hash estable del
+nombre) y cada proceso corre su propio motor. Los hechos sin producto
+(ConfiabilidadProveedor) se copian a todos los shards.
+"""
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# sistemaInventario aplica el parche de collections.Mapping antes de importar experta
+from prueba.sistemaInventario import InventarioExpertSystem, Producto, ListSink, ConsoleSink, Rule
+from translator import iter_facts, declare_in_batches
+
+def saliencias(engine_cls=InventarioExpertSystem):
+    """{ nombre_regla: salience } leído de la clase del motor."""
+    return {nombre: r.salience for nombre, r in vars(engine_cls).items() if isinstance(r, Rule)}
+
+def _clave_producto(clase, campos):
+    # Producto usa `nombre`; el resto de los hechos por producto usan `producto`
+    if clase is Producto:
+        return campos["nombre"]
+    return campos.get("producto")
+
+def particionar(hechos, n_shards):
+    """Reparte (Clase, campos) por crc32 del producto; los globales van a todos."""
+    shards = [[] for _ in range(n_shards)]
+    globales = []
+    for clase, campos in hechos:
+        clave = _clave_producto(clase, campos)
+        if clave is None:
+            globales.append((clase, campos))
+        else:
+            shards[zlib.crc32(str(clave).encode("utf-8")) % n_shards].append((clase, campos))
+    for shard in shards:
+        shard.extend(globales)
+    return shards
+
+def _correr_shard(hechos, indice=None):
+    engine = InventarioExpertSystem(sink=ListSink(flush_every=1000), indice=indice)
+    engine.reset()
+    declare_in_batches(engine, hechos)
+    engine.run()
+    return engine.sink.acciones
+
+def run_sharded(g, n_workers=None, confi_map=None, sink=None, indice=None):
+    """
+    Corre el motor en `n_workers` procesos y devuelve las acciones combinadas,
+    ordenadas por salience descendente (dentro de cada shard se respeta el orden
+    de disparo). Si se pasa un sink, también se emiten ahí. El índice de
+    proveedores (opcional) se copia a cada proceso.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    shards = [s for s in particionar(iter_facts(g, confi_map), n_workers) if s]
+    if len(shards) <= 1:
+        resultados = [_correr_shard(s, indice) for s in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            resultados = list(pool.map(_correr_shard, shards, [indice] * len(shards)))
+
+    sal = saliencias()
+    acciones = [a for res in resultados for a in res]
+    acciones.sort(key=lambda a: -sal.get(a["regla"], 0))  # sort estable
+    if sink is not None:
+        for a in acciones:
+            sink.emit(a)
+        sink.flush()
+    return acciones
+
+if __name__ == "__main__":
+    from cacheOntologia import OntologyCache
+    g_after, _, _ = OntologyCache().get_or_build()
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    run_sharded(g_after, n_workers=n, sink=ConsoleSink(flush_every=1000))
@@ -1,19 +1,176 @@
 # ontologia.py
-from rdflib import Graph, Namespace, Literal, RDF, RDFS, XSD, URIRef
+import json
+import struct
+from collections import defaultdict
+import numpy as np
+from rdflib import Graph, Namespace, Literal, RDF, RDFS, XSD, URIRef, BNode
+from rdflib.graph import ModificationException
 from rdflib.namespace import FOAF, DCTERMS
-from owlrl import DeductiveClosure, RDFS_Semantics
 
 # Namespaces propios
 BASE = Namespace("http://ejemplo.org/inventario#")
 SCHEMA = Namespace("http://schema.org/")
 
-def build_ontology():
-    g = Graph()
+class ChangeTrackingGraph(Graph):
+    """
+    Graph que, mientras haya un snapshot activo, registra en un diario los
+    triples que se agregan o quitan. Así el razonador no necesita copiar el
+    grafo para saber qué infirió, y se puede volver atrás con rollback().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._journal = None  # lista de (agregado: bool, triple)
+        self.version = 0      # sube con cada add/remove (invalida índices derivados)
+
+    def add(self, triple):
+        self._cambio(triple, True)
+        if self._journal is not None and triple not in self:
+            self._journal.append((True, triple))
+        return super().add(triple)
+
+    def addN(self, quads):
+        if self._journal is None:
+            self.version += 1
+            return super().addN(quads)
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+        return self
+
+    def remove(self, triple):
+        self._cambio(triple, False)
+        if self._journal is not None:
+            for t in list(self.triples(triple)):
+                self._journal.append((False, t))
+        return super().remove(triple)
+
+    def _cambio(self, triple, alta):
+        # Sube la versión. Si el índice de tipos estaba al día se actualiza en el
+        # lugar con el triple rdf:type / rdfs:subClassOf; con un patrón que podría
+        # tocarlos (remove con comodines) queda viejo y type_index() lo rearma.
+        idx = getattr(self, "_type_index", None)
+        al_dia = idx is not None and idx.graph_version == self.version
+        self.version += 1
+        if not al_dia:
+            return
+        s, p, o = triple
+        if p is None or (p in (RDF.type, RDFS.subClassOf) and (s is None or o is None)):
+            return
+        if p == RDF.type:
+            (idx.add_type if alta else idx.remove_type)(s, o)
+        elif p == RDFS.subClassOf:
+            (idx.add_subclass if alta else idx.remove_subclass)(s, o)
+        idx.graph_version = self.version
+
+    @property
+    def tracking(self):
+        return self._journal is not None
+
+    def snapshot(self) -> int:
+        """Marca el estado actual; devuelve una marca para changes_since/rollback."""
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    def changes_since(self, mark):
+        """(agregados, quitados) netos desde la marca."""
+        agregados, quitados = set(), set()
+        for es_alta, t in self._journal[mark:]:
+            if es_alta:
+                if t in quitados:
+                    quitados.discard(t)
+                else:
+                    agregados.add(t)
+            elif t in agregados:
+                agregados.discard(t)
+            else:
+                quitados.add(t)
+        return agregados, quitados
+
+    def rollback(self, mark):
+        """Deshace todos los cambios posteriores a la marca."""
+        journal, self._journal = self._journal, None
+        self.version += 1
+        for es_alta, t in reversed(journal[mark:]):
+            if es_alta:
+                super().remove(t)
+            else:
+                super().add(t)
+        self._journal = journal[:mark]
+
+    def release(self):
+        """Deja de registrar cambios y libera el diario."""
+        self._journal = None
+
+class GraphSnapshot:
+    """
+    Vista de solo lectura del grafo tal como estaba en una marca (sin copiarlo).
+    Los cambios desde la marca se fijan al crearla: deja de ser válida en cuanto
+    el grafo vuelve a cambiar.
+    """
+
+    def __init__(self, g: ChangeTrackingGraph, mark):
+        self.graph = g
+        self.added, self.removed = g.changes_since(mark)
+
+    def __len__(self):
+        return len(self.graph) - len(self.added) + len(self.removed)
+
+    def __contains__(self, t):
+        return t in self.removed or (t not in self.added and t in self.graph)
+
+    def __iter__(self):
+        for t in self.graph:
+            if t not in self.added:
+                yield t
+        yield from self.removed
+
+def default_data():
+    """Datos de instancia del inventario (productos, stocks, proveedores, pedidos)."""
+    return {
+        # --- Individuos (≥4 por clase principal) ---
+        "productos": ["Leche", "Arroz", "Pan", "Aceite", "Huevos", "Medicamentos", "Azucar", "Sal"],
+        "categorias": {
+            "Leche": "Perecedero", "Arroz": "NoPerecedero", "Pan": "Perecedero",
+            "Aceite": "NoPerecedero", "Huevos": "Perecedero", "Medicamentos": "Critico",
+            "Azucar": "NoPerecedero", "Sal": "NoPerecedero"
+        },
+        "demandas": {
+            "Leche": "Alta", "Arroz": "Baja", "Pan": "Alta", "Aceite": "Media",
+            "Huevos": "Alta", "Medicamentos": "Alta", "Azucar": "Media", "Sal": "Baja"
+        },
+        "proveedores": {
+            "ProveedorX": {"lead": 7, "calidad": 6},
+            "ProveedorY": {"lead": 5, "calidad": 7},
+            "ProveedorZ": {"lead": 10, "calidad": 8},
+            "ProveedorPrincipal": {"lead": 3, "calidad": 9},
+            # Proveedor genérico (no preferido)
+            "ProveedorSecundario": {"lead": 9, "calidad": 7},
+        },
+        "proveedores_preferidos": ["ProveedorPrincipal"],
+        "stocks": {
+            "Leche": 4, "Arroz": 60, "Pan": 0, "Aceite": 12,
+            "Huevos": 8, "Medicamentos": 5, "Azucar": 3, "Sal": 55
+        },
+        "asignacion_prov": {
+            "Leche": "ProveedorX", "Arroz": "ProveedorY", "Pan": "ProveedorX",
+            "Aceite": "ProveedorZ", "Huevos": "ProveedorX", "Medicamentos": "ProveedorPrincipal",
+            "Azucar": "ProveedorSecundario",
+            "Sal": "ProveedorY"
+        },
+        # pedidos (≥4): (producto, cantidad)
+        "pedidos": [("Leche", 10), ("Arroz", 5), ("Pan", 8), ("Medicamentos", 12), ("Huevos", 20)],
+    }
+
+def bind_namespaces(g: Graph):
     g.bind("base", BASE)
     g.bind("foaf", FOAF)
     g.bind("dcterms", DCTERMS)
     g.bind("schema", SCHEMA)
+    return g
 
+def add_schema(g: Graph):
+    """TBox: clases, jerarquías y propiedades con domain/range."""
     # --- Clases (>=10) ---
     clases = [
         "Producto", "Categoria", "Perecedero", "NoPerecedero", "Critico",
@@ -58,57 +215,29 @@ def build_ontology():
     g.add((BASE.proveedorPrincipal, RDFS.range, BASE.ProveedorPreferido))
     g.add((BASE.proveedorPrincipal, RDFS.subPropertyOf, BASE.tieneProveedor))
 
-    # --- Individuos (≥4 por clase principal) ---
-    productos = ["Leche", "Arroz", "Pan", "Aceite", "Huevos", "Medicamentos", "Azucar", "Sal"]
-    categorias = {
-        "Leche": "Perecedero", "Arroz": "NoPerecedero", "Pan": "Perecedero",
-        "Aceite": "NoPerecedero", "Huevos": "Perecedero", "Medicamentos": "Critico",
-        "Azucar": "NoPerecedero", "Sal": "NoPerecedero"
-    }
-    demandas = {
-        "Leche": "Alta", "Arroz": "Baja", "Pan": "Alta", "Aceite": "Media",
-        "Huevos": "Alta", "Medicamentos": "Alta", "Azucar": "Media", "Sal": "Baja"
-    }
-    proveedores = {
-        "ProveedorX": {"lead": 7, "calidad": 6},
-        "ProveedorY": {"lead": 5, "calidad": 7},
-        "ProveedorZ": {"lead": 10, "calidad": 8},
-        "ProveedorPrincipal": {"lead": 3, "calidad": 9}
-    }
+    return g
+
+def add_instances(g: Graph, data):
+    """ABox: proveedores, demandas, productos y pedidos a partir de `data`."""
+    preferidos = set(data.get("proveedores_preferidos", ()))
 
     # crear individuos de proveedor
-    for prov, attrs in proveedores.items():
+    for prov, attrs in data["proveedores"].items():
         pv = BASE[prov]
-        g.add((pv, RDF.type, BASE.ProveedorPreferido if prov=="ProveedorPrincipal" else BASE.Proveedor))
+        g.add((pv, RDF.type, BASE.ProveedorPreferido if prov in preferidos else BASE.Proveedor))
         g.add((pv, FOAF.name, Literal(prov)))
         g.add((pv, BASE.leadTimeDias, Literal(attrs["lead"], datatype=XSD.integer)))
         g.add((pv, BASE.calidad, Literal(attrs["calidad"], datatype=XSD.integer)))
 
     # crear individuos de demanda (una por producto)
-    for p, nivel in demandas.items():
+    for p, nivel in data["demandas"].items():
         d = BASE[f"Demanda_{p}"]
         g.add((d, RDF.type, BASE.Demanda))
         g.add((d, BASE.nivelDemanda, Literal(nivel)))
 
     # crear productos + propiedades
-    stocks = {
-        "Leche": 4, "Arroz": 60, "Pan": 0, "Aceite": 12,
-        "Huevos": 8, "Medicamentos": 5, "Azucar": 3, "Sal": 55
-    }
-    asignacion_prov = {
-        "Leche": "ProveedorX", "Arroz": "ProveedorY", "Pan": "ProveedorX",
-        "Aceite": "ProveedorZ", "Huevos": "ProveedorX", "Medicamentos": "ProveedorPrincipal",
-        "Azucar": "ProveedorSecundario",  # lo modelaremos como Proveedor genérico creado abajo
-        "Sal": "ProveedorY"
-    }
-    # Si no existe ProveedorSecundario, créalo:
-    sec = BASE["ProveedorSecundario"]
-    g.add((sec, RDF.type, BASE.Proveedor))
-    g.add((sec, FOAF.name, Literal("ProveedorSecundario")))
-    g.add((sec, BASE.leadTimeDias, Literal(9, datatype=XSD.integer)))
-    g.add((sec, BASE.calidad, Literal(7, datatype=XSD.integer)))
-
-    for p in productos:
+    categorias, stocks, asignacion_prov = data["categorias"], data["stocks"], data["asignacion_prov"]
+    for p in data["productos"]:
         pr = BASE[p]
         g.add((pr, RDF.type, BASE.Producto))
         g.add((pr, FOAF.name, Literal(p)))
@@ -123,32 +252,528 @@ def build_ontology():
         g.add((pr, BASE.tieneDemanda, d))
         # proveedor (usa subProperty si es principal)
         prov_uri = BASE[asignacion_prov[p]]
-        if asignacion_prov[p] == "ProveedorPrincipal":
+        if asignacion_prov[p] in preferidos:
             g.add((pr, BASE.proveedorPrincipal, prov_uri))
         else:
             g.add((pr, BASE.tieneProveedor, prov_uri))
 
-    # crear pedidos (≥4)
-    pedidos = [("Leche",10), ("Arroz",5), ("Pan",8), ("Medicamentos",12), ("Huevos",20)]
-    for i,(prod,cant) in enumerate(pedidos, start=1):
+    # crear pedidos
+    for i,(prod,cant) in enumerate(data["pedidos"], start=1):
         pe = BASE[f"Pedido_{i}"]
         g.add((pe, RDF.type, BASE.Pedido))
         g.add((pe, BASE.cantidadPedida, Literal(cant, datatype=XSD.integer)))
         # Enlazar pedido con producto (usaremos schema:itemOffered para ejemplificar externo)
         g.add((pe, SCHEMA.itemOffered, BASE[prod]))
+    return g
 
+def build_ontology(data=None):
+    g = bind_namespaces(ChangeTrackingGraph())
+    add_schema(g)
+    add_instances(g, data if data is not None else default_data())
     return g
 
-def reason_and_compare(g: Graph):
+def _expandir_rdfs(g: Graph):
+    # owlrl solo se importa al razonar (cargar/serializar snapshots no lo necesita)
+    from owlrl import DeductiveClosure, RDFS_Semantics
+    DeductiveClosure(RDFS_Semantics).expand(g)
+
+def _cerrar_jerarquia(g: Graph, pred):
+    """sub -> {sub y todos sus ancestros} para rdfs:subClassOf / rdfs:subPropertyOf."""
+    directos = defaultdict(set)
+    for a, _, b in g.triples((None, pred, None)):
+        directos[a].add(b)
+    cierre = {}
+    for a in list(directos):
+        vistos, pendientes = {a}, [a]
+        while pendientes:
+            for b in directos.get(pendientes.pop(), ()):
+                if b not in vistos:
+                    vistos.add(b)
+                    pendientes.append(b)
+        cierre[a] = vistos
+    return cierre
+
+def _expandir_lite(g: Graph):
+    """
+    Cierre acotado a lo que usan translator/main: subPropertyOf (rdfs7),
+    domain/range (rdfs2/3, sin tipar literales) y herencia de tipos por
+    subClassOf (rdfs9). No agrega rdfs:Resource, reflexivos ni tipos de
+    esquema. Una sola pasada: los subPropertyOf ya vienen cerrados.
+    """
+    superclases = _cerrar_jerarquia(g, RDFS.subClassOf)
+    superprops = _cerrar_jerarquia(g, RDFS.subPropertyOf)
+    dominios, rangos = defaultdict(set), defaultdict(set)
+    for p, _, c in g.triples((None, RDFS.domain, None)):
+        dominios[p].add(c)
+    for p, _, c in g.triples((None, RDFS.range, None)):
+        rangos[p].add(c)
+
+    nuevos = set()
+    tipos = defaultdict(set)
+    for s, p, o in g:
+        if p == RDF.type:
+            tipos[s].add(o)
+            continue
+        for q in superprops.get(p, (p,)):
+            if q != p:
+                nuevos.add((s, q, o))
+            tipos[s].update(dominios.get(q, ()))
+            if not isinstance(o, Literal):
+                tipos[o].update(rangos.get(q, ()))
+    for s, clases in tipos.items():
+        for c in clases:
+            for sup in superclases.get(c, (c,)):
+                nuevos.add((s, RDF.type, sup))
+    g.addN((s, p, o, g) for s, p, o in nuevos if (s, p, o) not in g)
+
+def _razonar(g: Graph, expandir):
+    if isinstance(g, ChangeTrackingGraph):
+        # Los inferidos salen del diario: no se copia el grafo ni se arman conjuntos
+        ya_registraba = g.tracking
+        mark = g.snapshot()
+        expandir(g)
+        g_before = GraphSnapshot(g, mark)
+        inferred = g_before.added
+        if not ya_registraba:
+            g.release()  # si no, el diario crece con cada cambio posterior
+        return g_before, g, inferred
     g_before = Graph()
     g_before += g  # copia
-    DeductiveClosure(RDFS_Semantics).expand(g)  # RDFS closure
+    expandir(g)
     # Devuelve conjuntos para comparar
     triples_before = set(g_before)
     triples_after = set(g)
     inferred = triples_after - triples_before
     return g_before, g, inferred
 
+def reason_and_compare(g: Graph):
+    return _razonar(g, _expandir_rdfs)  # RDFS closure
+
+def reason_lite(g: Graph):
+    return _razonar(g, _expandir_lite)
+
+def reason_query(g: Graph):
+    """
+    No materializa nada: devuelve el grafo envuelto en una VistaRDFS, que
+    responde tipos y subpropiedades con ConsultaRDFS al momento de cada consulta.
+    """
+    return g, VistaRDFS(g), set()
+
+class ConsultaRDFS:
+    """
+    Encadenamiento hacia atrás sobre el grafo sin razonar: responde rdf:type
+    (con subClassOf y domain/range) y propiedades con sus subpropiedades
+    en el momento de la consulta. Solo se precalcula la jerarquía del TBox.
+    """
+
+    def __init__(self, g: Graph):
+        self.graph = g
+        self._superclases = _cerrar_jerarquia(g, RDFS.subClassOf)
+        self._superprops = _cerrar_jerarquia(g, RDFS.subPropertyOf)
+        self._subclases, self._subprops = defaultdict(set), defaultdict(set)
+        for c, sups in self._superclases.items():
+            for sup in sups:
+                self._subclases[sup].add(c)
+        for p, sups in self._superprops.items():
+            for sup in sups:
+                self._subprops[sup].add(p)
+        self._dominios, self._rangos = defaultdict(set), defaultdict(set)
+        for p, _, c in g.triples((None, RDFS.domain, None)):
+            self._dominios[c].add(p)
+        for p, _, c in g.triples((None, RDFS.range, None)):
+            self._rangos[c].add(p)
+
+    def superclases(self, c):
+        return self._superclases.get(c, {c})
+
+    def subclases(self, c):
+        return self._subclases.get(c, set()) | {c}
+
+    def subpropiedades(self, p):
+        return self._subprops.get(p, set()) | {p}
+
+    def superpropiedades(self, p):
+        return self._superprops.get(p, {p})
+
+    def objetos(self, s, p):
+        """Objetos de (s, p) incluyendo los de sus subpropiedades."""
+        vistos = set()
+        for q in self.subpropiedades(p):
+            for o in self.graph.objects(s, q):
+                if o not in vistos:
+                    vistos.add(o)
+                    yield o
+
+    def sujetos(self, p, o=None):
+        vistos = set()
+        for q in self.subpropiedades(p):
+            for s in self.graph.subjects(q, o):
+                if s not in vistos:
+                    vistos.add(s)
+                    yield s
+
+    def tipos(self, s):
+        """Tipos de s: declarados, por domain/range de las propiedades que usa, y sus superclases."""
+        directos = set(self.graph.objects(s, RDF.type))
+        for p in set(self.graph.predicates(s, None)):
+            for q in self._superprops.get(p, (p,)):
+                directos.update(self.graph.objects(q, RDFS.domain))
+        for p in set(self.graph.predicates(None, s)):
+            for q in self._superprops.get(p, (p,)):
+                directos.update(self.graph.objects(q, RDFS.range))
+        return set().union(*(self.superclases(c) for c in directos)) if directos else set()
+
+    def tiene_tipo(self, s, c):
+        return c in self.tipos(s)
+
+    def instancias(self, c):
+        res = set()
+        for sub in self.subclases(c):
+            res.update(self.graph.subjects(RDF.type, sub))
+            for p in self._dominios.get(sub, ()):
+                res.update(self.sujetos(p))
+            for p in self._rangos.get(sub, ()):
+                for q in self.subpropiedades(p):
+                    res.update(o for o in self.graph.objects(None, q) if not isinstance(o, Literal))
+        return res
+
+class VistaRDFS(Graph):
+    """
+    Vista de solo lectura de un grafo sin razonar para el perfil "consulta".
+    Cada patrón de triples se resuelve con ConsultaRDFS (rdf:type con subClassOf
+    y domain/range, cada propiedad con sus subpropiedades), así que
+    translator.iter_facts, suppliers() o IndiceProveedores.desde_grafo la usan
+    como si fuera el grafo razonado. Recorrerla entera cuesta como razonar.
+    """
+
+    def __init__(self, g: Graph):
+        super().__init__(store=g.store, identifier=g.identifier)
+        self.grafo = g
+        self.consulta = ConsultaRDFS(g)
+
+    def _tipos(self, s, o):
+        c = self.consulta
+        if s is not None:
+            for t in c.tipos(s):
+                if o is None or t == o:
+                    yield s, RDF.type, t
+        elif o is not None:
+            for x in c.instancias(o):
+                yield x, RDF.type, o
+        else:
+            nodos = dict.fromkeys(self.grafo.subjects())
+            nodos.update(dict.fromkeys(x for x in self.grafo.objects() if not isinstance(x, Literal)))
+            for x in nodos:
+                for t in c.tipos(x):
+                    yield x, RDF.type, t
+
+    def triples(self, triple):
+        s, p, o = triple
+        if p == RDF.type:
+            yield from self._tipos(s, o)
+            return
+        grafo, c = self.grafo, self.consulta
+        if p is not None:
+            vistos = set()
+            for q in c.subpropiedades(p):
+                for s2, _, o2 in grafo.triples((s, q, o)):
+                    if (s2, o2) not in vistos:
+                        vistos.add((s2, o2))
+                        yield s2, p, o2
+            return
+        derivados = set()
+        for s2, q, o2 in grafo.triples((s, None, o)):
+            if q == RDF.type:
+                continue
+            yield s2, q, o2
+            for sup in c.superpropiedades(q):
+                t = (s2, sup, o2)
+                if sup != q and t not in derivados and t not in grafo:
+                    derivados.add(t)
+                    yield t
+        yield from self._tipos(s, o)
+
+    def __len__(self):
+        return sum(1 for _ in self.triples((None, None, None)))
+
+    def add(self, triple):
+        raise ModificationException()
+
+    def addN(self, quads):
+        raise ModificationException()
+
+    def remove(self, triple):
+        raise ModificationException()
+
+# Perfiles de razonamiento disponibles: nombre -> función(g) -> (g_before, g, inferred)
+# - rdfs: cierre RDFS completo (owlrl)
+# - lite: solo lo que consumen translator/main (herencia de tipos, subpropiedades, domain/range)
+# - consulta: nada materializado; el grafo devuelto es una VistaRDFS
+REASONING_PROFILES = {
+    "rdfs": reason_and_compare,
+    "lite": reason_lite,
+    "consulta": reason_query,
+}
+
+# Predicados de esquema: si un cambio los toca, se recalcula el cierre completo
+_SCHEMA_PREDICATES = {RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range}
+_SCHEMA_TYPES = {RDFS.Class, RDF.Property, RDFS.Datatype, RDFS.ContainerMembershipProperty}
+
+def _closure(triples):
+    g = Graph()
+    for t in triples:
+        g.add(t)
+    _expandir_rdfs(g)
+    return set(g)
+
+class IncrementalReasoner:
+    """
+    Mantiene el cierre RDFS de un grafo frente a deltas de triples de instancia.
+
+    En RDFS cada regla de instancia usa a lo sumo un triple que no es de esquema,
+    así que cierre(G ∪ Δ) = cierre(G) ∪ cierre(TBox ∪ Δ). Las altas se razonan
+    solo sobre TBox ∪ Δ; las bajas quitan lo que Δ implicaba y re-derivan lo que
+    siga soportado por los triples vecinos (sujetos afectados). Los cambios de
+    esquema (subClassOf, domain, ...) caen al cierre completo.
+    """
+
+    def __init__(self, g: Graph):
+        self.graph = g
+        self.full_closures = 0
+        self._full_closure()
+
+    def _full_closure(self):
+        if isinstance(self.graph, ChangeTrackingGraph):
+            ya_registraba = self.graph.tracking
+            mark = self.graph.snapshot()
+            _expandir_rdfs(self.graph)
+            self.inferred = self.graph.changes_since(mark)[0]
+            if not ya_registraba:
+                self.graph.release()
+        else:
+            antes = set(self.graph)
+            _expandir_rdfs(self.graph)
+            self.inferred = set(self.graph) - antes
+        self.full_closures += 1
+        self._tbox = [t for t in self.graph if self._is_schema(t)]
+        self._tbox_closure = _closure(self._tbox)
+
+    @staticmethod
+    def _is_schema(t):
+        return t[1] in _SCHEMA_PREDICATES or (t[1] == RDF.type and t[2] in _SCHEMA_TYPES)
+
+    def asserted(self, t):
+        return t in self.graph and t not in self.inferred
+
+    def apply(self, added=(), removed=()):
+        """
+        Aplica un delta de triples afirmados y actualiza el cierre en el lugar.
+        Devuelve (inferidos_nuevos, inferidos_retirados).
+        """
+        added = set(added)
+        removed = {t for t in removed if self.asserted(t)} - added
+        added = {t for t in added if t not in self.graph or t in self.inferred}
+        if not added and not removed:
+            return set(), set()
+
+        if any(self._is_schema(t) for t in added | removed):
+            previos = set(self.inferred)
+            for t in self.inferred:
+                self.graph.remove(t)
+            for t in removed:
+                self.graph.remove(t)
+            for t in added:
+                self.graph.add(t)
+            self._full_closure()
+            return self.inferred - previos, previos - self.inferred
+
+        retirados = self._remove(removed) if removed else set()
+
+        # Altas: lo que antes era inferido pasa a ser afirmado
+        self.inferred -= added
+        nuevos = _closure(self._tbox + list(added)) - self._tbox_closure
+        nuevos = {t for t in nuevos if t not in self.graph and t not in added}
+        for t in added | nuevos:
+            self.graph.add(t)
+        self.inferred |= nuevos
+        return nuevos - retirados, retirados - nuevos
+
+    def _remove(self, removed):
+        # Candidatos: todo lo que los triples quitados podían implicar
+        candidatos = (_closure(self._tbox + list(removed)) - self._tbox_closure)
+        candidatos = {t for t in candidatos if t in removed or t in self.inferred}
+        for t in candidatos:
+            self.graph.remove(t)
+        self.inferred -= candidatos
+
+        # Re-derivación desde los triples afirmados que quedan alrededor
+        afectados = {t[0] for t in candidatos}
+        soporte = set()
+        for x in afectados:
+            for t in self.graph.triples((x, None, None)):
+                soporte.add(t)
+            for t in self.graph.triples((None, None, x)):
+                soporte.add(t)
+            for t in self.graph.triples((None, x, None)):
+                soporte.add(t)
+                break  # basta un testigo del uso como propiedad
+        soporte = [t for t in soporte if t not in self.inferred]
+        rederivados = candidatos & _closure(self._tbox + soporte)
+        for t in rederivados:
+            self.graph.add(t)
+        self.inferred |= rederivados
+        return candidatos - rederivados
+
 def serialize_turtle(g: Graph, path="ontologia.ttl"):
     g.serialize(destination=path, format="turtle")
     return path
+
+# Snapshot binario: cabecera JSON con la tabla de términos + arreglo (N, 3) de ids
+_BIN_MAGIC = b"ONTOBIN1"
+
+def _encode_term(t):
+    if isinstance(t, Literal):
+        return ["L", str(t), str(t.datatype) if t.datatype else None, t.language]
+    if isinstance(t, BNode):
+        return ["B", str(t)]
+    return ["U", str(t)]
+
+def _decode_term(e):
+    if e[0] == "L":
+        return Literal(e[1], datatype=URIRef(e[2]) if e[2] else None, lang=e[3])
+    if e[0] == "B":
+        return BNode(e[1])
+    return URIRef(e[1])
+
+def serialize_binary(g: Graph, path="ontologia.bin"):
+    """
+    Guarda el grafo codificando cada término una sola vez (diccionario de ids)
+    y los triples como enteros uint32, listos para cargarse con memmap.
+    """
+    ids = {}
+    filas = []
+    for triple in g:
+        fila = []
+        for t in triple:
+            i = ids.get(t)
+            if i is None:
+                i = ids[t] = len(ids)
+            fila.append(i)
+        filas.append(fila)
+    triples = np.asarray(filas, dtype=np.uint32).reshape(-1, 3)
+    cabecera = json.dumps({
+        "terms": [_encode_term(t) for t in ids],
+        "namespaces": [[pfx, str(ns)] for pfx, ns in g.namespaces()],
+        "n_triples": len(triples),
+    }, ensure_ascii=False).encode("utf-8")
+    cabecera += b" " * (-(len(cabecera) + 16) % 8)  # el arreglo queda alineado a 8 bytes
+    with open(path, "wb") as f:
+        f.write(_BIN_MAGIC)
+        f.write(struct.pack("<Q", len(cabecera)))
+        f.write(cabecera)
+        f.write(triples.tobytes())
+    return path
+
+def read_binary(path="ontologia.bin"):
+    """Devuelve (términos, triples, namespaces) con los triples como memmap de solo lectura."""
+    with open(path, "rb") as f:
+        if f.read(8) != _BIN_MAGIC:
+            raise ValueError(f"{path} no es un snapshot binario de la ontología")
+        (n,) = struct.unpack("<Q", f.read(8))
+        cabecera = json.loads(f.read(n).decode("utf-8"))
+    terms = [_decode_term(e) for e in cabecera["terms"]]
+    if cabecera["n_triples"]:
+        triples = np.memmap(path, dtype=np.uint32, mode="r", offset=16 + n,
+                            shape=(cabecera["n_triples"], 3))
+    else:
+        triples = np.empty((0, 3), dtype=np.uint32)
+    return terms, triples, cabecera["namespaces"]
+
+def load_binary(path="ontologia.bin", graph_cls=None) -> Graph:
+    """Reconstruye el grafo guardado con serialize_binary (la exportación Turtle sigue aparte)."""
+    terms, triples, namespaces = read_binary(path)
+    g = (graph_cls or ChangeTrackingGraph)()
+    for pfx, ns in namespaces:
+        g.bind(pfx, ns, override=True)
+    g.addN((terms[s], terms[p], terms[o], g) for s, p, o in triples.tolist())
+    return g
+
+
+class TypeIndex:
+    """
+    Índice clase -> instancias (rdf:type) que respeta la jerarquía rdfs:subClassOf.
+    Se carga leyendo solo los triples rdf:type / rdfs:subClassOf del grafo y
+    luego se mantiene con add_type / remove_type / add_subclass / remove_subclass
+    (ChangeTrackingGraph los llama en cada add/remove).
+    """
+
+    def __init__(self, g=None):
+        self._directas = defaultdict(set)   # clase -> instancias declaradas
+        self._subclases = defaultdict(set)  # clase -> subclases directas
+        self.graph_version = None
+        if g is not None:
+            self.load(g)
+
+    def load(self, g):
+        for s, _, c in g.triples((None, RDF.type, None)):
+            self._directas[c].add(s)
+        for c, _, sup in g.triples((None, RDFS.subClassOf, None)):
+            if c != sup:
+                self._subclases[sup].add(c)
+        self.graph_version = getattr(g, "version", None)
+        return self
+
+    def add_type(self, s, cls):
+        self._directas[cls].add(s)
+
+    def remove_type(self, s, cls):
+        self._directas[cls].discard(s)
+
+    def add_subclass(self, cls, sup):
+        if cls != sup:
+            self._subclases[sup].add(cls)
+
+    def remove_subclass(self, cls, sup):
+        self._subclases[sup].discard(cls)
+
+    def subclasses(self, cls):
+        """La clase y todas sus subclases (cierre transitivo)."""
+        vistas, pendientes = {cls}, [cls]
+        while pendientes:
+            for sub in self._subclases.get(pendientes.pop(), ()):
+                if sub not in vistas:
+                    vistas.add(sub)
+                    pendientes.append(sub)
+        return vistas
+
+    def instances(self, cls):
+        res = set()
+        for c in self.subclasses(cls):
+            res |= self._directas.get(c, set())
+        return res
+
+def type_index(g: Graph) -> TypeIndex:
+    """
+    Índice de tipos asociado al grafo. Solo se reutiliza en grafos con contador
+    de cambios (ChangeTrackingGraph), que lo mantienen al día en add/remove; se
+    rearma si quedó viejo (addN, rollback, remove con comodines) y, en el resto
+    de los grafos, en cada llamada.
+    """
+    version = getattr(g, "version", None)
+    if version is None:
+        return TypeIndex(g)
+    idx = getattr(g, "_type_index", None)
+    if idx is None or idx.graph_version != version:
+        idx = TypeIndex(g)
+        g._type_index = idx
+    return idx
+
+def instances(g: Graph, cls):
+    consulta = getattr(g, "consulta", None)
+    if consulta is not None:
+        return consulta.instancias(cls)  # VistaRDFS: sin armar el índice de tipos
+    return type_index(g).instances(cls)
+
+def suppliers(g: Graph):
+    """Proveedores del grafo (incluye ProveedorPreferido por subClassOf)."""
+    return instances(g, BASE.Proveedor)
@@ -0,0 +1,139 @@
+# ontologiaAlmacenes.py
+"""
+Ontología particionada por almacén: un rdflib Dataset con un grafo nombrado
+para el TBox compartido (clases y propiedades, de solo lectura) y uno por
+almacén con sus datos de instancia ya razonados.
+
+En RDFS cada regla de instancia usa a lo sumo un triple que no es de esquema,
+así que cierre(TBox ∪ A1 ∪ A2) = cierre(TBox) ∪ ⋃ cierre(TBox ∪ Ai). El cierre
+del TBox se guarda una sola vez y cada partición guarda solo lo suyo
+(cierre(TBox ∪ Ai) - cierre(TBox)). Las particiones se razonan en paralelo
+(un proceso por almacén) y se pueden recargar de a una cuando cambia un almacén.
+
+Cada almacén se traduce/evalúa por separado con vista(nombre); la vista de
+todos sirve para inspección (el mismo producto puede tener un stock por almacén).
+
+Uso:
+    python prueba/ontologiaAlmacenes.py [n_almacenes] [productos_por_almacen]
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from rdflib import Dataset, Graph, Namespace, URIRef
+from rdflib.graph import ReadOnlyGraphAggregate
+
+from ontologia import (BASE, ChangeTrackingGraph, REASONING_PROFILES, add_instances, add_schema,
+                       bind_namespaces)
+
+ALMACEN = Namespace(str(BASE).rstrip("#") + "/almacen/")
+TBOX = URIRef(str(BASE).rstrip("#") + "/tbox")
+
+def _huella(datos):
+    return hashlib.sha256(json.dumps(datos, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _cerrar(perfil, triples):
+    g = ChangeTrackingGraph()
+    g.addN((s, p, o, g) for s, p, o in triples)
+    return REASONING_PROFILES[perfil](g)[1]
+
+def _cerrar_particion(perfil, tbox, cierre_tbox, datos):
+    # Corre en un proceso aparte: TBox + instancias del almacén, sin lo que ya es del TBox
+    g = ChangeTrackingGraph()
+    g.addN((s, p, o, g) for s, p, o in tbox)
+    add_instances(g, datos)
+    # con "consulta" se recorre la VistaRDFS: lo inferido se resuelve acá, por partición
+    g = REASONING_PROFILES[perfil](g)[1]
+    return [t for t in g if t not in cierre_tbox]
+
+class OntologiaAlmacenes:
+    def __init__(self, perfil="rdfs", n_workers=None):
+        self.perfil = perfil
+        self.n_workers = n_workers
+        self.dataset = bind_namespaces(Dataset())
+        self.dataset.bind("almacen", ALMACEN)
+        tbox = add_schema(Graph())
+        self._tbox = list(tbox)
+        self._cierre_tbox = set(_cerrar(perfil, self._tbox))
+        self.tbox = self.dataset.graph(TBOX)
+        self.tbox.addN((s, p, o, self.tbox) for s, p, o in self._cierre_tbox)
+        self.huellas = {}   # almacén -> hash de los datos cargados
+        self.recargas = 0
+
+    def almacenes(self):
+        return sorted(self.huellas)
+
+    def particion(self, nombre):
+        return self.dataset.graph(ALMACEN[nombre])
+
+    def _reemplazar(self, nombre, triples, huella):
+        self.dataset.remove_graph(ALMACEN[nombre])
+        g = self.dataset.graph(ALMACEN[nombre])
+        g.addN((s, p, o, g) for s, p, o in triples)
+        self.huellas[nombre] = huella
+        self.recargas += 1
+
+    def cargar(self, almacenes):
+        """
+        Carga/actualiza varios almacenes {nombre: datos (formato default_data)}.
+        Solo se razonan los que cambiaron, en paralelo. Devuelve los recargados.
+        """
+        pendientes = {n: d for n, d in almacenes.items() if self.huellas.get(n) != _huella(d)}
+        if not pendientes:
+            return []
+        nombres = list(pendientes)
+        args = ([self.perfil] * len(nombres), [self._tbox] * len(nombres),
+                [self._cierre_tbox] * len(nombres), [pendientes[n] for n in nombres])
+        n_workers = min(self.n_workers or os.cpu_count() or 1, len(nombres))
+        if n_workers <= 1:
+            resultados = list(map(_cerrar_particion, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                resultados = list(pool.map(_cerrar_particion, *args))
+        for nombre, triples in zip(nombres, resultados):
+            self._reemplazar(nombre, triples, _huella(pendientes[nombre]))
+        return nombres
+
+    def recargar(self, nombre, datos):
+        """Vuelve a razonar un solo almacén (no toca las otras particiones)."""
+        return self.cargar({nombre: datos})
+
+    def quitar(self, nombre):
+        self.dataset.remove_graph(ALMACEN[nombre])
+        self.huellas.pop(nombre, None)
+
+    def vista(self, nombres=None):
+        """
+        Grafo de solo lectura TBox + particiones pedidas (por defecto todas), apto
+        para translator.iter_facts, suppliers() o IndiceProveedores.desde_grafo.
+        """
+        nombres = self.almacenes() if nombres is None else [nombres] if isinstance(nombres, str) else nombres
+        return ReadOnlyGraphAggregate([self.tbox] + [self.particion(n) for n in nombres])
+
+if __name__ == "__main__":
+    from generador import generar_datos
+    from ontologia import build_ontology
+    n_almacenes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_productos = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    almacenes = {f"Almacen_{i}": generar_datos(n_productos, 30, 3, semilla=i)
+                 for i in range(1, n_almacenes + 1)}
+
+    t0 = time.perf_counter()
+    for datos in almacenes.values():
+        REASONING_PROFILES["rdfs"](build_ontology(datos))
+    print(f"Un grafo por almacén, en serie: {time.perf_counter() - t0:.3f}s")
+
+    onto = OntologiaAlmacenes()
+    t0 = time.perf_counter()
+    onto.cargar(almacenes)
+    print(f"Particiones en paralelo: {time.perf_counter() - t0:.3f}s "
+          f"({len(onto.dataset)} triples, TBox {len(onto.tbox)})")
+
+    stocks = almacenes["Almacen_1"]["stocks"]
+    cambiado = dict(almacenes["Almacen_1"], stocks=dict(stocks, Producto_1=stocks["Producto_1"] + 1))
+    t0 = time.perf_counter()
+    onto.recargar("Almacen_1", cambiado)
+    print(f"Recarga de un almacén: {time.perf_counter() - t0:.3f}s (recargas: {onto.recargas})")
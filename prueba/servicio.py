@@ -0,0 +1,283 @@
+# servicio.py
+"""
+Servicio de evaluación en memoria (asyncio + HTTP/JSON local).
+
+Carga una sola vez la ontología razonada, el controlador difuso compilado y un
+motor experta ya corrido, y responde consultas sin volver a pagar imports ni
+razonamiento. Las solicitudes concurrentes se agrupan en lotes: una sola
+llamada a evaluar_batch para puntuar y un solo engine.run() por lote de eventos.
+
+Endpoints:
+    GET  /salud
+    POST /puntuar   {"proveedores": [{"nombre": n, "lead": d, "calidad": q}, ...]}
+                    (sin cuerpo devuelve la confiabilidad de los proveedores del grafo)
+    POST /stock     {"producto": p, "cantidad": n} | {"producto": p, "delta": ±n}
+                    | {"eventos": [evento, ...]}   (mismos eventos que eventos.py,
+                    incluido {"tipo": "proveedor", "nombre": n, "lead": d, "calidad": q})
+    GET  /acciones?producto=p
+
+Uso:
+    python prueba/servicio.py [--host 127.0.0.1] [--puerto 8765]
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+class Coalescedor:
+    """
+    Junta los pedidos que llegan dentro de `ventana` segundos (hasta `max_lote`)
+    y los procesa con una sola llamada a `procesar(items) -> resultados`.
+    Si un resultado es una excepción, se propaga solo a ese pedido.
+    """
+
+    def __init__(self, procesar, ejecutor, max_lote=256, ventana=0.002):
+        self.procesar = procesar
+        self.ejecutor = ejecutor
+        self.max_lote = max_lote
+        self.ventana = ventana
+        self.lotes = 0
+        self._cola = asyncio.Queue()
+        self._tarea = None
+
+    async def enviar(self, item):
+        if self._tarea is None:
+            self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((item, futuro))
+        return await futuro
+
+    async def _bucle(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            limite = loop.time() + self.ventana
+            while len(lote) < self.max_lote:
+                resto = limite - loop.time()
+                if resto <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), resto))
+                except asyncio.TimeoutError:
+                    break
+            items = [item for item, _ in lote]
+            try:
+                resultados = await loop.run_in_executor(self.ejecutor, self.procesar, items)
+            except Exception as e:
+                resultados = [e] * len(lote)
+            self.lotes += 1
+            for (_, futuro), res in zip(lote, resultados):
+                if futuro.done():
+                    continue
+                if isinstance(res, Exception):
+                    futuro.set_exception(res)
+                else:
+                    futuro.set_result(res)
+
+# Reglas cuyas acciones vuelve a emitir cada tipo de evento (None = todas: todas
+# las reglas miran el Stock). Solo esas se reemplazan en las recomendaciones.
+REGLAS_POR_EVENTO = {
+    "stock": None,
+    "pedido": {"asignar_pedidos"},
+    "pedido_cancelado": {"asignar_pedidos"},
+    "proveedor": {"cambiar_proveedor", "proveedor_alternativo"},
+}
+
+class EstadoInventario:
+    """Grafo razonado, controlador y motor cargados una vez (no es thread-safe)."""
+
+    def __init__(self):
+        from cacheOntologia import OntologyCache
+        from indiceProveedores import IndiceProveedores
+        from translator import graph_to_facts
+        from prueba.sistemaDifuso import obtener_controlador
+        from prueba.sistemaInventario import InventarioExpertSystem, ListSink
+
+        self.grafo, _, _ = OntologyCache().get_or_build()
+        self.controlador = obtener_controlador()
+        self.indice = IndiceProveedores.desde_grafo(self.grafo, self.controlador)
+        self.confi_map = self.indice.confiabilidad
+
+        self.sink = ListSink()
+        self.engine = InventarioExpertSystem(sink=self.sink, indice=self.indice)
+        self.engine.reset()
+        graph_to_facts(self.grafo, self.engine, confi_map=self.confi_map)
+        self.engine.run()
+        # Recomendaciones vigentes por producto (cada evento reemplaza las de las
+        # reglas que vuelve a evaluar, ver REGLAS_POR_EVENTO)
+        self.recomendaciones = {}
+        self._repartir(self._tomar_acciones())
+
+    def _tomar_acciones(self):
+        acciones, self.sink.acciones = self.sink.acciones, []
+        return acciones
+
+    def _repartir(self, acciones):
+        for a in acciones:
+            self.recomendaciones.setdefault(a["producto"], []).append(a)
+
+    def puntuar_lote(self, items):
+        # items: listas de proveedores; una sola evaluación vectorizada para los válidos
+        leads, cals, validos, resultados = [], [], [], []
+        for provs in items:
+            try:
+                entradas = [(p.get("nombre"), float(p["lead"]), float(p["calidad"])) for p in provs]
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                resultados.append(ValueError(f"proveedor inválido: {e!r}"))
+                continue
+            validos.append((len(resultados), entradas))
+            resultados.append(None)
+            for _, lead, cal in entradas:
+                leads.append(lead)
+                cals.append(cal)
+        valores = [float(v) for v in self.controlador.evaluar_batch(leads, cals)] if leads else []
+        i = 0
+        for k, entradas in validos:
+            resultados[k] = [{"nombre": n, "confiabilidad": v}
+                             for (n, _, _), v in zip(entradas, valores[i:i + len(entradas)])]
+            i += len(entradas)
+        return resultados
+
+    def eventos_lote(self, items):
+        # items: listas de eventos; cada lista se valida entera antes de aplicarla
+        # (o se aplica toda o nada) y la agenda se corre una vez para el lote
+        resultados, tocados, reemplazar = [], [], {}
+        for eventos in items:
+            productos = set()
+            try:
+                for ev in eventos:
+                    self.engine.validar_evento(ev)
+            except (KeyError, ValueError, TypeError) as e:
+                resultados.append(ValueError(f"evento inválido (no se aplicó ninguno): {e!r}"))
+                tocados.append(productos)
+                continue
+            aplicados = 0
+            try:
+                for ev in eventos:
+                    # Un cambio de proveedor puede tocar varios productos; un evento
+                    # que no cambió nada no devuelve ninguno y no reemplaza nada
+                    afectados = self.engine.aplicar_evento(ev)
+                    aplicados += 1
+                    productos.update(afectados)
+                    self._marcar(reemplazar, afectados, REGLAS_POR_EVENTO[ev["tipo"]])
+            except (KeyError, ValueError, TypeError) as e:
+                resultados.append(ValueError(
+                    f"evento inválido (se aplicaron {aplicados} de {len(eventos)}): {e!r}"))
+            else:
+                resultados.append(None)
+            tocados.append(productos)
+        self.engine.run()
+        acciones = self._tomar_acciones()
+        for p, reglas in reemplazar.items():
+            if reglas is None:
+                self.recomendaciones.pop(p, None)
+            elif p in self.recomendaciones:
+                self.recomendaciones[p] = [a for a in self.recomendaciones[p] if a["regla"] not in reglas]
+        self._repartir(acciones)
+        for k, productos in enumerate(tocados):
+            if resultados[k] is None:
+                resultados[k] = [a for a in acciones if a["producto"] in productos]
+        return resultados
+
+    @staticmethod
+    def _marcar(reemplazar, productos, reglas):
+        # producto -> reglas a reemplazar (None = todas)
+        for p in productos:
+            if p in reemplazar and reemplazar[p] is None:
+                continue
+            reemplazar[p] = None if reglas is None else reemplazar.get(p, set()) | reglas
+
+class Servicio:
+    def __init__(self, estado=None, ventana=0.002, max_lote=256):
+        self.estado = estado if estado is not None else EstadoInventario()
+        # Un solo hilo: el motor se usa siempre de a un lote por vez
+        self._ejecutor = ThreadPoolExecutor(max_workers=1)
+        self.puntuar = Coalescedor(self.estado.puntuar_lote, self._ejecutor, max_lote, ventana)
+        self.eventos = Coalescedor(self.estado.eventos_lote, self._ejecutor, max_lote, ventana)
+
+    async def despachar(self, metodo, ruta, cuerpo):
+        url = urlsplit(ruta)
+        if metodo == "GET" and url.path == "/salud":
+            return 200, {"estado": "ok", "lotes_puntuar": self.puntuar.lotes,
+                         "lotes_eventos": self.eventos.lotes}
+        if metodo == "POST" and url.path == "/puntuar":
+            if not cuerpo:
+                return 200, self.estado.confi_map
+            return 200, await self.puntuar.enviar(cuerpo["proveedores"])
+        if metodo == "POST" and url.path == "/stock":
+            eventos = cuerpo.get("eventos") or [dict(cuerpo, tipo=cuerpo.get("tipo", "stock"))]
+            return 200, {"acciones": await self.eventos.enviar(eventos)}
+        if metodo == "GET" and url.path == "/acciones":
+            producto = parse_qs(url.query).get("producto", [None])[0]
+            # Se lee en el hilo del motor para no cruzarse con un lote en curso
+            recs = await asyncio.get_running_loop().run_in_executor(
+                self._ejecutor, lambda: {p: list(a) for p, a in self.estado.recomendaciones.items()})
+            if producto is None:
+                return 200, recs
+            return 200, {"producto": producto, "acciones": recs.get(producto, [])}
+        return 404, {"error": f"no existe {metodo} {url.path}"}
+
+    async def _responder(self, writer, estado, respuesta):
+        payload = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {estado} {'OK' if estado == 200 else 'Error'}\r\n"
+                     "Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+        await writer.drain()
+
+    async def atender(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                cabeceras = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    cabeceras[k.strip().lower()] = v.strip()
+                try:
+                    metodo, ruta, _ = linea.decode("latin-1").split(" ", 2)
+                    n = int(cabeceras.get("content-length", 0))
+                    if n < 0:
+                        raise ValueError(f"content-length negativo: {n}")
+                except ValueError as e:
+                    # Sin línea de pedido o largo válidos no se puede seguir leyendo la conexión
+                    await self._responder(writer, 400, {"error": f"solicitud mal formada: {e}"})
+                    break
+                datos = await reader.readexactly(n) if n else b""
+                try:
+                    cuerpo = json.loads(datos) if datos else {}
+                    estado, respuesta = await self.despachar(metodo, ruta, cuerpo)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    estado, respuesta = 400, {"error": str(e)}
+                await self._responder(writer, estado, respuesta)
+                if cabeceras.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self, host="127.0.0.1", puerto=8765):
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        print(f"Servicio de inventario en http://{host}:{puerto}")
+        async with servidor:
+            await servidor.serve_forever()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--puerto", type=int, default=8765)
+    ap.add_argument("--ventana", type=float, default=0.002, help="segundos para juntar un lote")
+    args = ap.parse_args(argv)
+    servicio = Servicio(ventana=args.ventana)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
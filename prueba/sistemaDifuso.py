@@ -1,7 +1,8 @@
 # fuzzy.py
+import hashlib
+import os
+import pickle
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
 
 def muy(mu):
     return mu ** 2
@@ -10,6 +11,10 @@ def mas_o_menos(mu):
     return np.sqrt(mu)
 
 def build_fuzzy_system():
+    # skfuzzy solo se importa al construir (el controlador compilado no lo necesita)
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+
     # Universos
     retraso = ctrl.Antecedent(np.arange(0, 16, 1), 'retraso')         # días
     calidad = ctrl.Antecedent(np.arange(0, 11, 1), 'calidad')          # 0..10
@@ -62,3 +67,330 @@ def eval_confiabilidad(sim, retraso_dias:int, calidad_score:int) -> float:
     sim.input['calidad'] = calidad_score
     sim.compute()
     return float(sim.output['confiabilidad'])
+
+
+
+# ------------------------------
+# Controlador compilado (vectorizado y persistible)
+# ------------------------------
+def _reglas(control_system):
+    # Reglas en orden de inserción (sin calcular el orden de ejecución de skfuzzy)
+    return [n for n in control_system.graph.nodes
+            if hasattr(n, 'antecedent') and hasattr(n, 'consequent')]
+
+def _compilar_antecedente(nodo):
+    # Term / TermAggregate de skfuzzy -> tuplas anidadas
+    if hasattr(nodo, 'kind'):
+        if nodo.kind == 'not':
+            return ('not', _compilar_antecedente(nodo.term1))
+        return (nodo.kind, _compilar_antecedente(nodo.term1), _compilar_antecedente(nodo.term2))
+    return ('term', nodo.parent.label, nodo.label)
+
+def _grado_antecedente(arbol, grados, and_func, or_func):
+    if arbol[0] == 'term':
+        return grados[arbol[1:]]
+    if arbol[0] == 'not':
+        return 1. - _grado_antecedente(arbol[1], grados, and_func, or_func)
+    a = _grado_antecedente(arbol[1], grados, and_func, or_func)
+    b = _grado_antecedente(arbol[2], grados, and_func, or_func)
+    return and_func(a, b) if arbol[0] == 'and' else or_func(a, b)
+
+def _centroide_filas(x, mf):
+    # Igual que skfuzzy.defuzzify.centroid (áreas exactas por tramo), por filas
+    x1, x2 = x[:, :-1], x[:, 1:]
+    y1, y2 = mf[:, :-1], mf[:, 1:]
+    dx = x2 - x1
+    valido = ~(((y1 == 0.) & (y2 == 0.)) | (x1 == x2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        momento = np.where(y1 == y2, 0.5 * (x1 + x2),
+                  np.where(y1 == 0., 2.0 / 3.0 * dx + x1,
+                  np.where(y2 == 0., 1.0 / 3.0 * dx + x1,
+                           (2.0 / 3.0 * dx * (y2 + 0.5 * y1)) / (y1 + y2) + x1)))
+        area = np.where(y1 == y2, dx * y1,
+               np.where(y1 == 0., 0.5 * dx * y2,
+               np.where(y2 == 0., 0.5 * dx * y1,
+                        0.5 * dx * (y1 + y2))))
+    momento = np.where(valido, momento, 0.)
+    area = np.where(valido, area, 0.)
+    suma_area = area.sum(axis=1)
+    resultado = (momento * area).sum(axis=1) / np.fmax(suma_area, np.finfo(float).eps)
+    # skfuzzy falla si el área total es cero; aquí se marca como NaN
+    return np.where(mf.sum(axis=1) == 0, np.nan, resultado)
+
+class _Malla:
+    """Malla regular 2D con interpolación bilineal (acotada a los bordes)."""
+
+    def __init__(self, valores, r0, c0, paso):
+        self.valores = valores
+        self.r0, self.c0, self.paso = r0, c0, paso
+        self.nr, self.nc = valores.shape
+
+    def _indices(self, valor, v0, n):
+        pos = min(max((valor - v0) / self.paso, 0.), n - 1.)
+        i = min(int(pos), n - 2)
+        return i, pos - i
+
+    def evaluar(self, r, c) -> float:
+        i, fr = self._indices(float(r), self.r0, self.nr)
+        j, fc = self._indices(float(c), self.c0, self.nc)
+        m = self.valores
+        return float((m[i, j] * (1 - fc) + m[i, j + 1] * fc) * (1 - fr)
+                     + (m[i + 1, j] * (1 - fc) + m[i + 1, j + 1] * fc) * fr)
+
+    def evaluar_batch(self, rs, cs) -> np.ndarray:
+        pr = np.clip((np.asarray(rs, dtype=np.float64) - self.r0) / self.paso, 0, self.nr - 1)
+        pc = np.clip((np.asarray(cs, dtype=np.float64) - self.c0) / self.paso, 0, self.nc - 1)
+        i = np.minimum(pr.astype(np.intp), self.nr - 2)
+        j = np.minimum(pc.astype(np.intp), self.nc - 2)
+        fr, fc = pr - i, pc - j
+        m = self.valores
+        return ((m[i, j] * (1 - fc) + m[i, j + 1] * fc) * (1 - fr)
+                + (m[i + 1, j] * (1 - fc) + m[i + 1, j + 1] * fc) * fr)
+
+class ControladorCompilado:
+    """
+    Copia del sistema difuso reducida a arreglos NumPy y reglas como tuplas.
+    No depende de skfuzzy, se puede guardar con pickle y evalúa en lote
+    reproduciendo ControlSystemSimulation.compute().
+    """
+
+    def __init__(self, antecedentes, consecuente, reglas, huella_fuente=None):
+        self.antecedentes = antecedentes    # { var: (universo, {termino: mf}) }
+        self.consecuente = consecuente      # (var, universo, {termino: mf}, accumulation)
+        self.reglas = reglas                # [(arbol, [(termino, peso)], and_func, or_func)]
+        self.huella_fuente = huella_fuente
+        self.version = VERSION_CONTROLADOR
+        self._mallas = {}
+
+    def _cortes(self, entradas):
+        grados = {}
+        for var, (universo, terminos) in self.antecedentes.items():
+            x = np.clip(entradas[var], universo.min(), universo.max())
+            for label, mf in terminos.items():
+                grados[(var, label)] = np.interp(x, universo, mf)
+        accumulation = self.consecuente[3]
+        cortes = {}
+        for arbol, salidas, and_func, or_func in self.reglas:
+            firing = _grado_antecedente(arbol, grados, and_func, or_func)
+            for label, peso in salidas:
+                valor = firing * peso
+                cortes[label] = accumulation(valor, cortes[label]) if label in cortes else valor
+        return cortes
+
+    def evaluar_batch(self, retrasos, calidades) -> np.ndarray:
+        retrasos = np.atleast_1d(np.asarray(retrasos, dtype=np.float64))
+        calidades = np.atleast_1d(np.asarray(calidades, dtype=np.float64))
+        if retrasos.shape != calidades.shape:
+            raise ValueError("retrasos y calidades deben tener la misma forma")
+        n = retrasos.size
+        cortes = self._cortes({'retraso': retrasos.ravel(), 'calidad': calidades.ravel()})
+        _, universo, terminos, _ = self.consecuente
+
+        # Puntos extra donde cada término cruza su nivel de corte (como
+        # _interp_universe_fast): a lo sumo uno por término y tramo del universo
+        puntos = [np.broadcast_to(universo, (n, universo.size))]
+        for label, mf in terminos.items():
+            if label not in cortes:
+                continue
+            y = cortes[label][:, None]
+            sobre = np.where(y == 0., mf > y, mf >= y)
+            cruza = np.diff(sobre, axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xx = universo[:-1] + (y - mf[:-1]) * np.diff(universo) / np.diff(mf)
+            # los tramos sin cruce se rellenan con un punto ya existente
+            puntos.append(np.where(cruza, xx, universo[-1]))
+        x = np.sort(np.concatenate(puntos, axis=1), axis=1)
+
+        salida = np.zeros_like(x)
+        for label, mf in terminos.items():
+            if label not in cortes:
+                continue
+            np.maximum(salida, np.minimum(cortes[label][:, None], np.interp(x, universo, mf)), salida)
+
+        return _centroide_filas(x, salida).reshape(retrasos.shape)
+
+    def evaluar(self, retraso_dias, calidad_score) -> float:
+        return float(self.evaluar_batch(retraso_dias, calidad_score)[0])
+
+    def superficie(self, paso=0.25) -> _Malla:
+        """Malla retraso x calidad precalculada (se guarda junto al controlador)."""
+        malla = self._mallas.get(paso)
+        if malla is None:
+            r_u = self.antecedentes['retraso'][0]
+            c_u = self.antecedentes['calidad'][0]
+            r0, c0 = float(r_u.min()), float(c_u.min())
+            r = r0 + paso * np.arange(int(round((float(r_u.max()) - r0) / paso)) + 1)
+            c = c0 + paso * np.arange(int(round((float(c_u.max()) - c0) / paso)) + 1)
+            R, C = np.meshgrid(r, c, indexing='ij')
+            malla = _Malla(self.evaluar_batch(R, C), r0, c0, float(paso))
+            self._mallas[paso] = malla
+        return malla
+
+    def guardar(self, ruta):
+        with open(ruta, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return ruta
+
+    @staticmethod
+    def cargar(ruta):
+        with open(ruta, 'rb') as f:
+            return pickle.load(f)
+
+def _acumulacion(func):
+    # accumulation_max de skfuzzy equivale a np.fmax; así el pickle no arrastra skfuzzy
+    return np.fmax if getattr(func, '__name__', '') == 'accumulation_max' else func
+
+def compilar_controlador(sim, huella_fuente=None) -> ControladorCompilado:
+    """Extrae de un simulador de build_fuzzy_system() todo lo necesario para evaluar."""
+    cs = sim.ctrl
+    antecedentes = {a.label: (np.asarray(a.universe, dtype=np.float64),
+                              {l: np.asarray(t.mf, dtype=np.float64) for l, t in a.terms.items()})
+                    for a in cs.antecedents}
+    cons = next(iter(cs.consequents))
+    consecuente = (cons.label, np.asarray(cons.universe, dtype=np.float64),
+                   {l: np.asarray(t.mf, dtype=np.float64) for l, t in cons.terms.items()},
+                   _acumulacion(cons.accumulation_method))
+    reglas = [(_compilar_antecedente(r.antecedent),
+               [(wt.term.label, wt.weight) for wt in r.consequent],
+               r.and_func, r.or_func) for r in _reglas(cs)]
+    return ControladorCompilado(antecedentes, consecuente, reglas, huella_fuente)
+
+
+# ------------------------------
+# Instancia única persistida
+# ------------------------------
+# Caché en el repo (no en el directorio de trabajo): <raíz>/.cache_controlador/,
+# aparte de la de OntologyCache para no ocupar un lugar entre sus entradas
+RUTA_CONTROLADOR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                ".cache_controlador", "controlador_confiabilidad.pkl")
+# Subir si cambia la estructura de ControladorCompilado (invalida los pickles viejos)
+VERSION_CONTROLADOR = 1
+_controlador = None
+
+def _huella_fuente() -> str:
+    # Si cambia este archivo (membresías o reglas), el controlador guardado caduca
+    with open(__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def obtener_controlador(ruta=None) -> ControladorCompilado:
+    """
+    Devuelve el controlador compilado del proceso (se construye una sola vez).
+    Se carga de disco si existe y corresponde a este código y a esta versión;
+    si no (o si el pickle no se puede leer), se compila desde
+    build_fuzzy_system() y se guarda para los próximos arranques.
+    """
+    global _controlador
+    if _controlador is not None:
+        return _controlador
+    ruta = ruta or RUTA_CONTROLADOR
+    huella = _huella_fuente()
+    if os.path.exists(ruta):
+        try:
+            c = ControladorCompilado.cargar(ruta)
+            if (getattr(c, "version", None) == VERSION_CONTROLADOR
+                    and getattr(c, "huella_fuente", None) == huella):
+                _controlador = c
+                return c
+        except (OSError, EOFError, pickle.UnpicklingError, ImportError, AttributeError,
+                IndexError, TypeError, ValueError):
+            pass  # pickle corrupto o de otra versión del código: se reconstruye
+    c = compilar_controlador(build_fuzzy_system()[3], huella)
+    c.superficie()
+    try:
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        c.guardar(ruta)
+    except OSError:
+        pass  # sin permisos de escritura: se usa igual en memoria
+    _controlador = c
+    return c
+
+
+# ------------------------------
+# Evaluación vectorizada (lotes)
+# ------------------------------
+def eval_confiabilidad_batch(retrasos, calidades, sim=None) -> np.ndarray:
+    """
+    Versión vectorizada de eval_confiabilidad para muchos proveedores a la vez.
+    - retrasos, calidades: arreglos (o listas) de igual longitud
+    - sim: simulador de build_fuzzy_system(); si no se pasa se usa el controlador del proceso
+    Reproduce el cálculo de skfuzzy (membresías, 9 reglas, agregación con
+    corte y centroide sobre el universo remuestreado) sin llamar a compute().
+    """
+    controlador = compilar_controlador(sim) if sim is not None else obtener_controlador()
+    return controlador.evaluar_batch(retrasos, calidades)
+
+
+# ------------------------------
+# Modo superficie (precalculado)
+# ------------------------------
+def huella_sistema(control_system) -> str:
+    """Hash de universos, membresías y reglas; cambia si se edita cualquiera."""
+    h = hashlib.blake2b(digest_size=16)
+    variables = list(control_system.antecedents) + list(control_system.consequents)
+    for var in sorted(variables, key=lambda v: v.label):
+        h.update(var.label.encode())
+        h.update(np.ascontiguousarray(var.universe, dtype=np.float64).tobytes())
+        h.update(str(getattr(var, 'defuzzify_method', '')).encode())
+        for label, term in var.terms.items():
+            h.update(label.encode())
+            h.update(np.ascontiguousarray(term.mf, dtype=np.float64).tobytes())
+    for regla in _reglas(control_system):
+        h.update(repr(regla).encode())
+    return h.hexdigest()
+
+class SuperficieConfiabilidad:
+    """
+    Malla densa retraso x calidad -> confiabilidad sobre un simulador editable,
+    construida de forma perezosa y consultada por interpolación bilineal.
+    La malla se reconstruye sola si cambian las membresías o las reglas.
+    """
+
+    def __init__(self, sim=None, paso=0.25):
+        self.sim = sim if sim is not None else build_fuzzy_system()[3]
+        self.paso = float(paso)
+        self.invalidar()
+
+    def invalidar(self):
+        self._malla = None
+        self._huella = None
+        self._firma = None
+
+    def _objetos_vigilados(self):
+        # nodos del grafo (reglas, variables, términos) y sus membresías/antecedentes
+        objs = []
+        for n in self.sim.ctrl.graph.nodes:
+            objs.append(n)
+            if hasattr(n, 'terms'):
+                for t in n.terms.values():
+                    objs.extend((t, t.mf))
+            if hasattr(n, 'antecedent'):
+                objs.extend((n.antecedent, n.consequent))
+        return objs
+
+    def _asegurar_malla(self):
+        # Chequeo rápido por identidad; solo si algo cambió se recalcula el hash.
+        # (Si se modifica un arreglo de membresía in situ, llamar a invalidar().)
+        objs = self._objetos_vigilados()
+        firma = tuple(map(id, objs))
+        if self._malla is not None and firma == self._firma:
+            return self._malla
+        self._firma, self._vigilados = firma, objs  # mantiene vivos los ids
+        huella = huella_sistema(self.sim.ctrl)
+        if self._malla is None or huella != self._huella:
+            self._malla = compilar_controlador(self.sim).superficie(self.paso)
+            self._huella = huella
+        return self._malla
+
+    def evaluar(self, retraso_dias, calidad_score) -> float:
+        return self._asegurar_malla().evaluar(retraso_dias, calidad_score)
+
+    def evaluar_batch(self, retrasos, calidades) -> np.ndarray:
+        return self._asegurar_malla().evaluar_batch(retrasos, calidades)
+
+def eval_confiabilidad_superficie(sim, retraso_dias, calidad_score) -> float:
+    """Como eval_confiabilidad, pero usando la superficie precalculada del simulador."""
+    superficie = getattr(sim, '_superficie_confiabilidad', None)
+    if superficie is None:
+        superficie = SuperficieConfiabilidad(sim)
+        sim._superficie_confiabilidad = superficie
+    return superficie.evaluar(retraso_dias, calidad_score)
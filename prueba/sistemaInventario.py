@@ -1,10 +1,21 @@
 # experto.py
 import collections
 import collections.abc
+import copyreg
+import hashlib
+import itertools
+import json
+import pickle
+import time
 if not hasattr(collections, 'Mapping'):
     collections.Mapping = collections.abc.Mapping
 
 from experta import *
+from experta.activation import Activation
+from experta.agenda import Agenda
+from experta.matchers.rete.token import TokenInfo
+
+from prueba.asignacionPedidos import asignar_por_producto
 
 class Producto(Fact): pass
 class Stock(Fact): pass
@@ -15,30 +26,691 @@ class Categoria(Fact): pass
 class ConfiabilidadProveedor(Fact): """valor 0..10""" ; pass
 class AccionTomada(Fact): """marca de control para no repetir acciones""" ; pass
 
+# Ids para los pedidos que llegan sin "id" (únicos en el proceso, también entre motores)
+_ids_pedido = itertools.count(1)
+
+# ------------------------------
+# Destinos de acciones (sinks)
+# ------------------------------
+# Severidad y mensaje de cada acción (regla o "regla:variante")
+PLANTILLAS = {
+    "reponer_urgente": ("alta", "⚠️ Reposición urgente para {p}, stock muy bajo (cantidad={c})"),
+    "reponer_pronto": ("media", "🔄 Programar reposición para {p}, stock bajo (cantidad={c})"),
+    "sobrestock": ("baja", "📦 {p} está en sobrestock, considerar promoción (cantidad={c})"),
+    "stock_agotado": ("critica", "❌ {p} agotado. Bloqueando ventas."),
+    "alta_demanda_bajo_stock": ("alta", "🔥 Alta demanda y poco stock en {p}, aumentar pedido (cantidad={c})"),
+    "baja_demanda_alto_stock": ("baja", "🛑 {p} tiene baja demanda y sobrestock, reducir compras (cantidad={c})"),
+    "demanda_media": ("media", "➖ {p} con demanda media y poco stock, reponer moderadamente (cantidad={c})"),
+    "cambiar_proveedor": ("media", "🔄 {p} con {proveedor} y stock crítico. Considerar otro proveedor (cantidad={c})"),
+    "cambiar_proveedor:alternativa": ("media", "🔄 {p} con {proveedor} (poco confiable) y stock crítico. Considerar {alternativa} (cantidad={c})"),
+    "proveedor_alternativo": ("media", "📌 {p} tiene proveedor {proveedor} pero stock crítico. Consultar {alternativa} (cantidad={c})"),
+    "asignar_pedidos:faltante": ("alta", "🚚 {pedidos} pedido(s) de {p} suman {total_pedido} y el stock es {c}: faltan {faltante}, generar reposición"),
+    "asignar_pedidos:cubre": ("info", "📦 {pedidos} pedido(s) de {p} ({total_pedido}) se cubren con el stock disponible ({c})"),
+    "sobrestock_perecedero": ("media", "⚠️ {p} es perecedero y tiene sobrestock, aplicar promoción (cantidad={c})"),
+    "no_perecedero_critico": ("media", "📦 {p} no perecedero con stock crítico, reponer sin urgencia (cantidad={c})"),
+    "producto_critico": ("critica", "🚨 {p} es CRÍTICO y su stock es muy bajo. Reposición inmediata (cantidad={c})"),
+    "evitar_duplicados": ("alta", "⚠️ {p} tiene stock inválido ({c}), corrigiendo."),
+}
+
+def proveedor_poco_confiable(indice, nombre):
+    """Sin índice de confiabilidad se usa la regla fija original (ProveedorX)."""
+    return nombre == "ProveedorX" if indice is None else indice.poco_confiable(nombre)
+
+def proveedor_alternativa(indice, producto, nombre):
+    """Proveedor a consultar en lugar de `nombre`, o None si ya es el mejor."""
+    if indice is None:
+        return None if nombre == "ProveedorPrincipal" else "ProveedorPrincipal"
+    return indice.alternativa(producto, nombre)
+
+def construir_accion(regla, producto, cantidad, variante=None, **extra):
+    """Registro estructurado de una acción: regla, producto, cantidad, severidad, mensaje."""
+    severidad, plantilla = PLANTILLAS[regla if variante is None else f"{regla}:{variante}"]
+    accion = {"regla": regla, "producto": producto, "cantidad": cantidad, "severidad": severidad,
+              "mensaje": plantilla.format(p=producto, c=cantidad, **extra)}
+    accion.update(extra)
+    return accion
+
+class ActionSink:
+    """
+    Destino con buffer para las acciones que emiten las reglas. Cada acción es un
+    dict con regla, producto, cantidad, severidad y mensaje (más campos extra).
+    Política de vaciado: cada `flush_every` acciones, cada `flush_interval`
+    segundos (si se indica) y siempre al terminar engine.run().
+    """
+
+    def __init__(self, flush_every=500, flush_interval=None):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._ultimo_flush = time.monotonic()
+
+    def emit(self, accion):
+        self._buffer.append(accion)
+        if len(self._buffer) >= self.flush_every or (
+                self.flush_interval is not None
+                and time.monotonic() - self._ultimo_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+        self._ultimo_flush = time.monotonic()
+
+    def _write(self, acciones):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+class ConsoleSink(ActionSink):
+    """Imprime el mensaje de cada acción (comportamiento original)."""
+
+    def __init__(self, flush_every=1, flush_interval=None):
+        super().__init__(flush_every, flush_interval)
+
+    def _write(self, acciones):
+        print("\n".join(a["mensaje"] for a in acciones))
+
+class ListSink(ActionSink):
+    """Acumula las acciones en memoria (self.acciones)."""
+
+    def __init__(self, flush_every=1, flush_interval=None):
+        super().__init__(flush_every, flush_interval)
+        self.acciones = []
+
+    def _write(self, acciones):
+        self.acciones.extend(acciones)
+
+class JsonlSink(ActionSink):
+    """Agrega las acciones a un archivo JSONL, por lotes."""
+
+    def __init__(self, path, flush_every=500, flush_interval=None):
+        super().__init__(flush_every, flush_interval)
+        self.path = path
+
+    def _write(self, acciones):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(a, ensure_ascii=False) + "\n" for a in acciones)
+
+class NullSink(ActionSink):
+    """Descarta todo (útil para medir solo el motor)."""
+
+    def emit(self, accion):
+        pass
+
+    def _write(self, acciones):
+        pass
+
+class _AgendaContada(Agenda):
+    """Agenda que cuenta las activaciones que se disparan."""
+
+    def __init__(self, estadisticas):
+        super().__init__()
+        self.estadisticas = estadisticas
+
+    def get_next(self):
+        activation = super().get_next()
+        if activation is not None:
+            self.estadisticas["reglas_disparadas"] += 1
+        return activation
+
+class PerfilReglas:
+    """
+    Perfil por regla (modo opcional de InventarioExpertSystem): activaciones
+    creadas y disparadas, disparos sin efecto (el cuerpo no emitió ni retractó
+    nada), tiempo acumulado y máximo en el cuerpo, y retracciones hechas por la
+    regla. El tiempo de matching de la red Rete no se reparte entre reglas.
+    """
+    CAMPOS = ("creadas", "disparadas", "sin_efecto", "segundos", "max_segundos", "retracciones")
+
+    def __init__(self):
+        self.reglas = {}
+        self._actual = None  # (regla, efectos al empezar, t0)
+        self._efectos = 0
+
+    def _fila(self, regla):
+        fila = self.reglas.get(regla)
+        if fila is None:
+            fila = self.reglas[regla] = dict.fromkeys(self.CAMPOS, 0)
+        return fila
+
+    def creadas(self, activaciones):
+        for act in activaciones:
+            self._fila(act.rule._wrapped.__name__)["creadas"] += 1
+
+    def empezar(self, regla):
+        self._actual = (regla, self._efectos, time.perf_counter())
+
+    def terminar(self):
+        if self._actual is None:
+            return
+        segundos = time.perf_counter() - self._actual[2]
+        regla, efectos, _ = self._actual
+        self._actual = None
+        fila = self._fila(regla)
+        fila["disparadas"] += 1
+        fila["segundos"] += segundos
+        fila["max_segundos"] = max(fila["max_segundos"], segundos)
+        if self._efectos == efectos:
+            fila["sin_efecto"] += 1
+
+    def efecto(self, retraccion=False):
+        self._efectos += 1
+        if retraccion and self._actual is not None:
+            self._fila(self._actual[0])["retracciones"] += 1
+
+    def ordenado(self, por="segundos"):
+        return sorted(self.reglas.items(), key=lambda kv: (-kv[1][por], kv[0]))
+
+    def reporte(self, por="segundos"):
+        """Tabla de texto, de mayor a menor según `por`."""
+        lineas = [f"{'regla':26s} {'creadas':>8s} {'disparadas':>10s} {'sin_efecto':>10s} "
+                  f"{'total_ms':>9s} {'max_ms':>8s} {'retracc':>7s}"]
+        for regla, f in self.ordenado(por):
+            lineas.append(f"{regla:26s} {f['creadas']:8d} {f['disparadas']:10d} {f['sin_efecto']:10d} "
+                          f"{f['segundos'] * 1e3:9.2f} {f['max_segundos'] * 1e3:8.3f} {f['retracciones']:7d}")
+        return "\n".join(lineas)
+
+    def exportar_json(self, path="perfil_reglas.json", por="segundos"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(dict(self.ordenado(por)), f, indent=2, ensure_ascii=False)
+        return path
+
+class _AgendaPerfilada(_AgendaContada):
+    """_AgendaContada que además marca el inicio del cuerpo de cada regla."""
+
+    def __init__(self, estadisticas, perfil):
+        super().__init__(estadisticas)
+        self.perfil = perfil
+
+    def get_next(self):
+        activation = super().get_next()
+        if activation is not None:
+            self.perfil.empezar(activation.rule._wrapped.__name__)
+        return activation
+
+# Hechos que intervienen en la asignación de pedidos (ver asignacionPedidos.py)
+_HECHOS_ASIGNACION = (Stock, Pedido, Categoria, Demanda)
+
+# Atributos con estado de los nodos Rete (el resto de la red es fija por clase)
+_MEMORIAS_RETE = ("left_memory", "right_memory", "memory", "added", "removed")
+
+class InstantaneaMotor:
+    """
+    Estado de un motor ya declarado: lista de hechos, memorias de los nodos Rete y
+    agenda. La red no se copia: las memorias se guardan por una clave estructural
+    de cada nodo y se cargan en la red de un motor nuevo de la misma clase, así que
+    la instantánea sirve en el mismo proceso o guardada en disco.
+    """
+
+    def __init__(self, clase, hechos, contadores, memorias, agenda, estadisticas):
+        self.clase = clase
+        self.hechos = hechos              # [(idx, Fact)]
+        self.contadores = contadores      # last_index, reference_counter
+        self.memorias = memorias          # {clave de nodo: {atributo: contenedor}}
+        self.agenda = agenda              # [(regla, hechos, contexto, key)]
+        self.estadisticas = estadisticas
+
+    def restaurar(self, sink=None, indice=None):
+        """Crea un motor nuevo (misma clase) en el estado de la instantánea."""
+        engine = self.clase(sink=sink, indice=indice)
+        engine.restaurar(self)
+        return engine
+
+    def guardar(self, ruta):
+        with open(ruta, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def cargar(ruta):
+        with open(ruta, "rb") as f:
+            return pickle.load(f)
+
+# TokenInfo.__new__ espera el contexto como dict: pickle por defecto no lo reconstruye
+copyreg.pickle(TokenInfo, lambda t: (TokenInfo, (t.data, dict(t.context))))
+
+def _describir(obj):
+    # Descripción estable entre procesos (sin direcciones de memoria)
+    if hasattr(obj, "__code__"):
+        return f"{obj.__qualname__}@{obj.__code__.co_firstlineno}"
+    if isinstance(obj, type):
+        return obj.__qualname__
+    if isinstance(obj, (tuple, list)):
+        # W/MATCH guardan el nombre ligado en __bind__, fuera de la tupla
+        ligado = getattr(obj, "__bind__", None)
+        return (type(obj).__name__ + "(" + ",".join(_describir(x) for x in obj) + ")"
+                + (f"={ligado}" if ligado else ""))
+    if hasattr(obj, "__dict__") and type(obj).__repr__ is object.__repr__:
+        return type(obj).__name__ + _describir(sorted(vars(obj).items()))
+    return repr(obj)
+
+def _patrones(regla, salida):
+    if isinstance(regla, Fact):
+        salida.append(regla)
+    elif isinstance(regla, tuple):
+        for x in regla:
+            _patrones(x, salida)
+    return salida
+
+def _traducir_token(info, mapa):
+    if any(k in mapa for k, _ in info.context):
+        return type(info)(info.data, {mapa.get(k, k): v for k, v in info.context})
+    return info
+
+def _traducir_memoria(valor, mapa):
+    if isinstance(valor, dict):
+        return {_traducir_token(t, mapa): n for t, n in valor.items()}
+    return type(valor)(_traducir_token(t, mapa) for t in valor)
+
 class InventarioExpertSystem(KnowledgeEngine):
+    def __init__(self, sink=None, indice=None, perfilar=False):
+        self.estadisticas = {"hechos_declarados": 0, "activaciones_creadas": 0,
+                             "reglas_disparadas": 0}
+        # Con perfilar=False no hay agenda perfilada y los ganchos son un `is None`
+        self.perfil = PerfilReglas() if perfilar else None
+        super().__init__()
+        self.sink = sink if sink is not None else ConsoleSink()
+        self.indice = indice  # IndiceProveedores opcional (reglas de cambio de proveedor)
+        self._por_asignar = set()  # productos cuyos pedidos hay que volver a asignar
+        self.indexar_hechos()
+
+    def reset(self, **kwargs):
+        super().reset(**kwargs)
+        self.agenda = (_AgendaContada(self.estadisticas) if self.perfil is None
+                       else _AgendaPerfilada(self.estadisticas, self.perfil))
+        self._por_asignar = set()
+        self.indexar_hechos()
+
+    def declare(self, *facts):
+        self.estadisticas["hechos_declarados"] += len(facts)
+        resultado = super().declare(*facts)
+        for fact in facts:
+            idx = fact.get('__factid__')
+            if self.facts.get(idx) is fact:  # un duplicado no se agrega a la lista
+                self._indexar(idx, fact)
+                if isinstance(fact, _HECHOS_ASIGNACION):
+                    self._por_asignar.add(fact['producto'])
+        return resultado
+
+    def retract(self, idx_or_declared_fact):
+        fact = self.facts.get(idx_or_declared_fact) if isinstance(idx_or_declared_fact, int) \
+            else idx_or_declared_fact
+        if self.perfil is not None:
+            self.perfil.efecto(retraccion=True)
+        resultado = super().retract(idx_or_declared_fact)
+        self._desindexar(fact.get('__factid__'), fact)
+        if isinstance(fact, _HECHOS_ASIGNACION):
+            self._por_asignar.add(fact['producto'])
+        return resultado
+
+    def get_activations(self):
+        if self.perfil is not None:
+            # run() vuelve acá al salir del cuerpo de la regla anterior
+            self.perfil.terminar()
+        added, removed = super().get_activations()
+        self.estadisticas["activaciones_creadas"] += len(added)
+        if self.perfil is not None:
+            self.perfil.creadas(added)
+        return added, removed
+
+    def emitir(self, regla, producto, cantidad, variante=None, **extra):
+        if self.perfil is not None:
+            self.perfil.efecto()
+        self.sink.emit(construir_accion(regla, producto, cantidad, variante, **extra))
+
+    def run(self, steps=float('inf')):
+        try:
+            resultado = super().run(steps)
+            if self.perfil is not None:
+                self.perfil.terminar()  # corrida cortada por `steps`
+            if not self.agenda.activations:
+                if self.perfil is not None:
+                    self.perfil.empezar("asignar_pedidos")
+                self.asignar_pedidos()
+            return resultado
+        finally:
+            if self.perfil is not None:
+                self.perfil.terminar()
+            self.sink.flush()
+
+    def asignar_pedidos(self):
+        """
+        Etapa de asignación (después de las reglas): reparte el stock entre los
+        pedidos pendientes de los productos que cambiaron, leyendo solo los índices
+        por producto, y emite una decisión por producto (ver asignacionPedidos).
+        Un producto sin Stock vigente (agotado o inválido, ya retractado) cuenta
+        con stock 0.
+        """
+        if not self._por_asignar:
+            return []
+        productos, self._por_asignar = self._por_asignar, set()
+        indices = self._por_producto
+        por_producto, stocks, categorias, demandas = {}, {}, {}, {}
+        for p in productos:
+            pedidos = indices[Pedido].get(p)
+            if not pedidos:
+                continue
+            # edad = orden de declaración
+            por_producto[p] = [(idx, fact['cantidad']) for idx, fact in pedidos.items()]
+            for fact in indices[Stock].get(p, {}).values():
+                stocks[p] = fact['cantidad']
+                break
+            if p in indices[Categoria]:
+                categorias[p] = [fact['nombre'] for fact in indices[Categoria][p].values()]
+            for fact in indices[Demanda].get(p, {}).values():
+                demandas[p] = fact['nivel']
+                break
+        decisiones = asignar_por_producto(por_producto, stocks, categorias, demandas)
+        for d in decisiones:
+            self.emitir("asignar_pedidos", d["producto"], d["stock"],
+                        variante="faltante" if d["faltante"] else "cubre", pedidos=d["pedidos"],
+                        total_pedido=d["total_pedido"], asignado=d["asignado"], faltante=d["faltante"])
+        return decisiones
+
+    # ------------------------------
+    # Instantáneas de la memoria de trabajo (corridas "what-if")
+    # ------------------------------
+    def _red_rete(self):
+        """
+        Nodos de la red con una clave estructural estable (tipo, chequeo, reglas
+        alcanzables y claves de los padres) y el mapa captura local -> canónica.
+        """
+        padres, orden, pila = {}, [], [self.matcher.root_node]
+        while pila:
+            nodo = pila.pop()
+            for hijo in nodo.children:
+                if id(hijo.node) not in padres:
+                    padres[id(hijo.node)] = []
+                    pila.append(hijo.node)
+                padres[id(hijo.node)].append((nodo, hijo.callback.__name__))
+            orden.append(nodo)
+        # experta nombra cada captura con el id() de un patrón (uno por grupo de patrones
+        # iguales); el nombre canónico sale del contenido del patrón
+        capturas = {}
+        for nodo in orden:
+            if hasattr(nodo, "rule"):
+                for patron in _patrones(nodo.rule, []):
+                    campos = sorted(patron.items(), key=lambda kv: str(kv[0]))
+                    capturas["__pattern_%s__" % id(patron)] = \
+                        f"__pattern_{type(patron).__name__}{_describir(campos)}__"
+        # Reglas alcanzables desde cada nodo: distingue nodos con la misma estructura
+        # (experta no comparte, p.ej., los joins Proveedor×Stock de dos reglas)
+        alcance = {}
+        def _alcance(nodo):
+            if id(nodo) not in alcance:
+                propias = {nodo.rule._wrapped.__name__} if hasattr(nodo, "rule") else set()
+                alcance[id(nodo)] = ",".join(sorted(propias.union(
+                    *(_alcance(h.node).split(",") for h in nodo.children)) - {""}))
+            return alcance[id(nodo)]
+        claves, pendientes = {id(self.matcher.root_node): "raiz"}, orden[1:]
+        while pendientes:
+            resto = []
+            for nodo in pendientes:
+                if any(id(p) not in claves for p, _ in padres[id(nodo)]):
+                    resto.append(nodo)
+                    continue
+                if hasattr(nodo, "rule"):
+                    desc = nodo.rule._wrapped.__name__
+                elif hasattr(nodo.matcher, "bind"):
+                    b = nodo.matcher.bind
+                    desc = capturas.get(b, "__pattern_libre__" if b.startswith("__pattern_") else b)
+                else:
+                    desc = _describir(nodo.matcher)
+                base = sorted(f"{cb}<{claves[id(p)]}" for p, cb in padres[id(nodo)])
+                texto = f"{type(nodo).__name__}|{desc}|{_alcance(nodo)}|{'|'.join(base)}"
+                claves[id(nodo)] = hashlib.sha1(texto.encode("utf-8")).hexdigest()[:20]
+            if len(resto) == len(pendientes):
+                raise ValueError("Red Rete con ciclos")
+            pendientes = resto
+        if len(set(claves.values())) != len(claves):
+            raise ValueError("Nodos Rete indistinguibles: no se puede tomar una instantánea")
+        return [(claves[id(n)], n) for n in orden], capturas
+
+    def instantanea(self):
+        """Copia de hechos + memorias Rete + agenda, sin los nodos (ver InstantaneaMotor)."""
+        red, capturas = self._red_rete()
+        memorias = {clave: {a: _traducir_memoria(v, capturas)
+                            for a, v in vars(n).items() if a in _MEMORIAS_RETE}
+                    for clave, n in red}
+        agenda = [(act.rule._wrapped.__name__, list(act.facts),
+                   {capturas.get(k, k): v for k, v in act.context.items()}, act.key)
+                  for act in self.agenda.activations]
+        contadores = {"last_index": self.facts.last_index,
+                      "reference_counter": collections.Counter(self.facts.reference_counter),
+                      "por_asignar": sorted(self._por_asignar)}
+        return InstantaneaMotor(type(self), list(self.facts.items()), contadores, memorias,
+                                agenda, dict(self.estadisticas))
+
+    def restaurar(self, inst):
+        """Pone este motor en el estado de `inst` sin volver a declarar los hechos."""
+        if inst.clase is not type(self):
+            raise ValueError(f"La instantánea es de {inst.clase.__name__}, no de {type(self).__name__}")
+        red, capturas = self._red_rete()
+        if {clave for clave, _ in red} != set(inst.memorias):
+            raise ValueError("La instantánea es de otra versión de las reglas")
+        # Varios patrones iguales comparten una captura: vale el bind que usa la red
+        binds = [getattr(getattr(n, "matcher", None), "bind", None) for _, n in red]
+        locales = {capturas[b]: b for b in binds if b in capturas}
+        self.reset()
+        for clave, nodo in red:
+            for atributo, valor in inst.memorias[clave].items():
+                setattr(nodo, atributo, _traducir_memoria(valor, locales))
+        self.facts.clear()
+        self.facts.update(inst.hechos)
+        self.facts.last_index = inst.contadores["last_index"]
+        self.facts.reference_counter = collections.Counter(inst.contadores["reference_counter"])
+        self.facts.added, self.facts.removed = [], []
+        self._por_asignar = set(inst.contadores.get("por_asignar", ()))
+        self.indexar_hechos()
+        # Las activaciones usan la regla de cada ConflictSetNode (sin ligar a la instancia)
+        reglas = {n.rule._wrapped.__name__: n.rule for _, n in red if hasattr(n, "rule")}
+        for nombre, hechos, contexto, key in inst.agenda:
+            act = Activation(reglas[nombre], hechos, {locales.get(k, k): v for k, v in contexto.items()})
+            act.key = key
+            self.agenda.activations.append(act)
+        self.estadisticas.update(inst.estadisticas)
+
+    # ------------------------------
+    # Modo de larga duración: eventos de stock/pedidos sobre la memoria de trabajo
+    # ------------------------------
+    def indexar_hechos(self):
+        """
+        Rearma los índices de la memoria de trabajo (al crear el motor, en reset y
+        en restaurar); después los mantienen declare/retract, sin volver a recorrerla:
+        - _por_producto: clase de _HECHOS_ASIGNACION -> producto -> {idx: hecho},
+          en orden de declaración (asignar_pedidos)
+        - _stocks: producto -> Stock; _pedidos: (producto, id) -> Pedido
+        - _proveedores: producto -> [Proveedor]; _confiabilidades: nombre -> ConfiabilidadProveedor
+        """
+        self._por_producto = {clase: {} for clase in _HECHOS_ASIGNACION}
+        self._stocks, self._pedidos, self._proveedores, self._confiabilidades = {}, {}, {}, {}
+        for idx, fact in getattr(self, "facts", {}).items():
+            self._indexar(idx, fact)
+
+    @staticmethod
+    def _clave_pedido(idx, fact):
+        # un Pedido declarado sin id se indexa por su número de hecho
+        return (fact['producto'], fact.get('id', ('hecho', idx)))
+
+    def _indexar(self, idx, fact):
+        if isinstance(fact, _HECHOS_ASIGNACION):
+            p = fact['producto']
+            self._por_producto[type(fact)].setdefault(p, {})[idx] = fact
+            if isinstance(fact, Stock):
+                self._stocks[p] = fact
+            elif isinstance(fact, Pedido):
+                self._pedidos[self._clave_pedido(idx, fact)] = fact
+        elif isinstance(fact, Proveedor):
+            self._proveedores.setdefault(fact['producto'], []).append(fact)
+        elif isinstance(fact, ConfiabilidadProveedor):
+            self._confiabilidades[fact['nombre']] = fact
+
+    def _desindexar(self, idx, fact):
+        if isinstance(fact, _HECHOS_ASIGNACION):
+            p = fact['producto']
+            hechos = self._por_producto[type(fact)].get(p, {})
+            hechos.pop(idx, None)
+            if not hechos:
+                self._por_producto[type(fact)].pop(p, None)
+            if isinstance(fact, Stock) and self._stocks.get(p) is fact:
+                # si quedaba otro Stock del producto, pasa a ser el vigente (el último)
+                if hechos:
+                    self._stocks[p] = next(reversed(hechos.values()))
+                else:
+                    del self._stocks[p]
+            elif isinstance(fact, Pedido):
+                clave = self._clave_pedido(idx, fact)
+                if self._pedidos.get(clave) is fact:
+                    del self._pedidos[clave]
+        elif isinstance(fact, Proveedor):
+            p = fact['producto']
+            restantes = [f for f in self._proveedores.get(p, ()) if f is not fact]
+            if restantes:
+                self._proveedores[p] = restantes
+            else:
+                self._proveedores.pop(p, None)
+        elif isinstance(fact, ConfiabilidadProveedor) and self._confiabilidades.get(fact['nombre']) is fact:
+            del self._confiabilidades[fact['nombre']]
+
+    def _buscar(self, indice, clave):
+        # Los índices están al día (declare/retract): si no está, no existe
+        return getattr(self, indice).get(clave)
+
+    def _pedido_por_cantidad(self, p, cantidad):
+        # Pedido vigente más antiguo de p con esa cantidad (o None)
+        for fact in self._por_producto[Pedido].get(p, {}).values():
+            if fact['cantidad'] == cantidad:
+                return fact
+        return None
+
+    def validar_evento(self, evento):
+        """
+        Revisa un evento sin aplicarlo: lanza KeyError/ValueError/TypeError por lo
+        mismo que fallaría aplicar_evento (sirve para validar un lote completo antes
+        de tocar la memoria de trabajo).
+        """
+        tipo = evento['tipo']
+        if tipo == 'proveedor':
+            if self.indice is None:
+                raise ValueError("Los eventos de proveedor necesitan un IndiceProveedores")
+            n = evento['nombre']
+            for campo in ('lead', 'calidad'):
+                if evento.get(campo) is not None:
+                    float(evento[campo])
+                elif n not in self.indice.entradas:
+                    raise KeyError(f"Proveedor sin leadTimeDias/calidad: {n}")
+            return
+        hash(evento['producto'])  # es clave de los índices
+        if tipo == 'stock':
+            int(evento['delta'] if 'delta' in evento else evento['cantidad'])
+        elif tipo == 'pedido':
+            int(evento['cantidad'])
+        elif tipo == 'pedido_cancelado':
+            if 'id' not in evento:
+                int(evento['cantidad'])
+        else:
+            raise ValueError(f"Tipo de evento desconocido: {tipo}")
+
+    def aplicar_evento(self, evento):
+        """
+        Aplica un evento sin reconstruir la memoria de trabajo:
+        - {"tipo": "stock", "producto": p, "cantidad": n}  (o "delta": ±n)
+        - {"tipo": "pedido", "producto": p, "cantidad": q, "id": opcional ("auto-N" si falta)}
+        - {"tipo": "pedido_cancelado", "producto": p, "id": ...} (o "cantidad": el más antiguo)
+        - {"tipo": "proveedor", "nombre": n, "lead": d, "calidad": q} (requiere índice)
+        Solo se modifica/retracta el hecho afectado; las reglas se disparan con run().
+        Devuelve los productos cuyos hechos cambiaron (vacío si el evento no cambió
+        nada: un pedido repetido o una cancelación de un pedido que no existe).
+        """
+        if evento['tipo'] == 'proveedor':
+            return self._actualizar_proveedor(evento)
+        tipo, p = evento['tipo'], evento['producto']
+        if tipo == 'stock':
+            actual = self._buscar('_stocks', p)
+            vigente = actual is not None
+            if 'delta' in evento:
+                base = actual['cantidad'] if vigente else 0
+                cantidad = base + int(evento['delta'])
+            else:
+                cantidad = int(evento['cantidad'])
+            if vigente:
+                self.modify(actual, cantidad=cantidad)
+            else:
+                self.declare(Stock(producto=p, cantidad=cantidad))
+        elif tipo == 'pedido':
+            cantidad = int(evento['cantidad'])
+            id_pedido = evento['id'] if 'id' in evento else f"auto-{next(_ids_pedido)}"
+            fact = Pedido(producto=p, cantidad=cantidad, id=id_pedido)
+            self.declare(fact)
+            if self.facts.get(fact.get('__factid__')) is not fact:
+                return ()
+        elif tipo == 'pedido_cancelado':
+            if 'id' in evento:
+                fact = self._buscar('_pedidos', (p, evento['id']))
+            else:
+                fact = self._pedido_por_cantidad(p, int(evento['cantidad']))
+            if fact is None:
+                return ()
+            self.retract(fact)
+        else:
+            raise ValueError(f"Tipo de evento desconocido: {tipo}")
+        return (p,)
+
+    def _actualizar_proveedor(self, evento):
+        if self.indice is None:
+            raise ValueError("Los eventos de proveedor necesitan un IndiceProveedores")
+        n = evento['nombre']
+        afectados = self.indice.actualizar_proveedor(n, evento.get('lead'), evento.get('calidad'))
+        conf = self._buscar('_confiabilidades', n)
+        if conf is not None:
+            self.modify(conf, valor=self.indice.confiabilidad[n])
+        # Se re-declaran los Proveedor de los productos cuya recomendación cambió,
+        # para que las reglas de cambio de proveedor vuelvan a evaluarse;
+        # retract/declare mantienen el índice de cada producto
+        for producto in afectados:
+            for fact in list(self._buscar('_proveedores', producto) or ()):
+                campos = {k: v for k, v in fact.items() if not fact.is_special(k)}
+                self.retract(fact)
+                self.declare(Proveedor(**campos))
+        return afectados
+
+    def _sugerir_cambio(self, p, n, c):
+        if proveedor_poco_confiable(self.indice, n):
+            alt = proveedor_alternativa(self.indice, p, n) if self.indice is not None else None
+            if alt is None:
+                self.emitir("cambiar_proveedor", p, c, proveedor=n)
+            else:
+                self.emitir("cambiar_proveedor", p, c, variante="alternativa", proveedor=n, alternativa=alt)
+
+    def _sugerir_alternativa(self, p, n, c):
+        alt = proveedor_alternativa(self.indice, p, n)
+        if alt is not None:
+            self.emitir("proveedor_alternativo", p, c, proveedor=n, alternativa=alt)
+
     # 📌 1. Reposición urgente
     @Rule(Stock(producto=MATCH.p, cantidad=MATCH.c), salience=40)
     def reponer_urgente(self, p, c):
         if c < 5:
-            print(f"⚠️ Reposición urgente para {p}, stock muy bajo (cantidad={c})")
+            self.emitir("reponer_urgente", p, c)
 
     # 📌 2. Reposición programada
     @Rule(Stock(producto=MATCH.p, cantidad=MATCH.c), salience=30)
     def reponer_pronto(self, p, c):
         if 5 <= c < 10:
-            print(f"🔄 Programar reposición para {p}, stock bajo (cantidad={c})")
+            self.emitir("reponer_pronto", p, c)
 
     # 📌 3. Sobrestock
     @Rule(Stock(producto=MATCH.p, cantidad=MATCH.c), salience=20)
     def sobrestock(self, p, c):
         if c >= 50:
-            print(f"📦 {p} está en sobrestock, considerar promoción (cantidad={c})")
+            self.emitir("sobrestock", p, c)
 
     # 📌 4. Stock agotado
     @Rule(AS.s << Stock(producto=MATCH.p, cantidad=MATCH.c), salience=50)
     def stock_agotado(self, s, p, c):
         if c == 0:
-            print(f"❌ {p} agotado. Bloqueando ventas.")
+            self.emitir("stock_agotado", p, c)
             self.retract(s)
 
     # 📌 5. Alta demanda + bajo stock
@@ -47,7 +719,7 @@ class InventarioExpertSystem(KnowledgeEngine):
         salience=35)
     def alta_demanda_bajo_stock(self, p, c):
         if c < 20:
-            print(f"🔥 Alta demanda y poco stock en {p}, aumentar pedido (cantidad={c})")
+            self.emitir("alta_demanda_bajo_stock", p, c)
 
     # 📌 6. Baja demanda + alto stock
     @Rule(Demanda(producto=MATCH.p, nivel="Baja"),
@@ -55,7 +727,7 @@ class InventarioExpertSystem(KnowledgeEngine):
         salience=25)
     def baja_demanda_alto_stock(self, p, c):
         if c > 30:
-            print(f"🛑 {p} tiene baja demanda y sobrestock, reducir compras (cantidad={c})")
+            self.emitir("baja_demanda_alto_stock", p, c)
 
     # 📌 7. Demanda media
     @Rule(Demanda(producto=MATCH.p, nivel="Media"),
@@ -63,41 +735,26 @@ class InventarioExpertSystem(KnowledgeEngine):
         salience=25)
     def demanda_media(self, p, c):
         if c < 10:
-            print(f"➖ {p} con demanda media y poco stock, reponer moderadamente (cantidad={c})")
+            self.emitir("demanda_media", p, c)
 
-    # 📌 8. Proveedor poco confiable
-    @Rule(Proveedor(producto=MATCH.p, nombre="ProveedorX"),
+    # 📌 8. Proveedor poco confiable (ranking de confiabilidad si hay índice)
+    @Rule(Proveedor(producto=MATCH.p, nombre=MATCH.n),
         Stock(producto=MATCH.p, cantidad=MATCH.c),
         salience=30)
-    def cambiar_proveedor(self, p, c):
+    def cambiar_proveedor(self, p, n, c):
         if c < 10:
-            print(f"🔄 {p} con ProveedorX y stock crítico. Considerar otro proveedor (cantidad={c})")
+            self._sugerir_cambio(p, n, c)
 
-    # 📌 9. Proveedor alternativo
+    # 📌 9. Proveedor alternativo (el mejor de la categoría que supere al actual)
     @Rule(Proveedor(producto=MATCH.p, nombre=MATCH.n),
         Stock(producto=MATCH.p, cantidad=MATCH.c),
         salience=20)
     def proveedor_alternativo(self, p, n, c):
-        if c < 5 and n != "ProveedorPrincipal":
-            print(f"📌 {p} tiene proveedor {n} pero stock crítico. Consultar ProveedorPrincipal (cantidad={c})")
-
-    # 📌 10. Pedido supera stock
-    @Rule(Pedido(producto=MATCH.p, cantidad=MATCH.q),
-        Stock(producto=MATCH.p, cantidad=MATCH.s),
-        salience=35)
-    def verificar_pedido(self, p, q, s):
-        if q > s:
-            print(f"🚚 Pedido de {q} {p} supera stock ({s}), generar reposición")
-        else:
-            print(f"✅ Pedido de {q} {p} puede cubrirse con stock disponible")
+        if c < 5:
+            self._sugerir_alternativa(p, n, c)
 
-    # 📌 11. Pedido cubierto
-    @Rule(Pedido(producto=MATCH.p, cantidad=MATCH.q),
-        Stock(producto=MATCH.p, cantidad=MATCH.s),
-        salience=15)
-    def pedido_cubierto(self, p, q, s):
-        if q <= s:
-            print(f"📦 Pedido de {q} {p} se cubre sin problema (stock={s})")
+    # 📌 10-11. Pedidos vs. stock: ya no son reglas Pedido×Stock, se resuelven
+    # agregados por producto en asignar_pedidos() al terminar run()
 
     # 📌 12. Perecederos en sobrestock
     @Rule(Categoria(producto=MATCH.p, nombre="Perecedero"),
@@ -105,7 +762,7 @@ class InventarioExpertSystem(KnowledgeEngine):
         salience=20)
     def sobrestock_perecedero(self, p, c):
         if c > 30:
-            print(f"⚠️ {p} es perecedero y tiene sobrestock, aplicar promoción (cantidad={c})")
+            self.emitir("sobrestock_perecedero", p, c)
 
     # 📌 13. No perecederos críticos
     @Rule(Categoria(producto=MATCH.p, nombre="NoPerecedero"),
@@ -113,7 +770,7 @@ class InventarioExpertSystem(KnowledgeEngine):
         salience=15)
     def no_perecedero_critico(self, p, c):
         if c < 5:
-            print(f"📦 {p} no perecedero con stock crítico, reponer sin urgencia (cantidad={c})")
+            self.emitir("no_perecedero_critico", p, c)
 
     # 📌 14. Producto crítico
     @Rule(Categoria(producto=MATCH.p, nombre="Crítico"),
@@ -121,12 +778,98 @@ class InventarioExpertSystem(KnowledgeEngine):
         salience=35)
     def producto_critico(self, p, c):
         if c < 10:
-            print(f"🚨 {p} es CRÍTICO y su stock es muy bajo. Reposición inmediata (cantidad={c})")
+            self.emitir("producto_critico", p, c)
 
     # 📌 15. Evitar duplicados / datos inválidos
     @Rule(AS.s << Stock(producto=MATCH.p, cantidad=MATCH.c),
         salience=100)
     def evitar_duplicados(self, s, p, c):
         if c < 0:
-            print(f"⚠️ {p} tiene stock inválido ({c}), corrigiendo.")
+            self.emitir("evitar_duplicados", p, c)
             self.retract(s)
+
+class InventarioFiltrado(InventarioExpertSystem):
+    """
+    Mismas reglas, saliencias y acciones que InventarioExpertSystem, pero con los
+    umbrales expresados como restricciones P()/TEST() en los patrones: la red Rete
+    descarta los Stock que no cumplen y la agenda solo recibe activaciones útiles.
+    """
+
+    @Rule(Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 5)), salience=40)
+    def reponer_urgente(self, p, c):
+        self.emitir("reponer_urgente", p, c)
+
+    @Rule(Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: 5 <= c < 10)), salience=30)
+    def reponer_pronto(self, p, c):
+        self.emitir("reponer_pronto", p, c)
+
+    @Rule(Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c >= 50)), salience=20)
+    def sobrestock(self, p, c):
+        self.emitir("sobrestock", p, c)
+
+    @Rule(AS.s << Stock(producto=MATCH.p, cantidad=MATCH.c & 0), salience=50)
+    def stock_agotado(self, s, p, c):
+        self.emitir("stock_agotado", p, c)
+        self.retract(s)
+
+    @Rule(Demanda(producto=MATCH.p, nivel="Alta"),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 20)),
+        salience=35)
+    def alta_demanda_bajo_stock(self, p, c):
+        self.emitir("alta_demanda_bajo_stock", p, c)
+
+    @Rule(Demanda(producto=MATCH.p, nivel="Baja"),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c > 30)),
+        salience=25)
+    def baja_demanda_alto_stock(self, p, c):
+        self.emitir("baja_demanda_alto_stock", p, c)
+
+    @Rule(Demanda(producto=MATCH.p, nivel="Media"),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 10)),
+        salience=25)
+    def demanda_media(self, p, c):
+        self.emitir("demanda_media", p, c)
+
+    # Qué proveedor es poco confiable lo decide el índice en tiempo de ejecución:
+    # en el patrón queda solo el umbral de stock
+    @Rule(Proveedor(producto=MATCH.p, nombre=MATCH.n),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 10)),
+        salience=30)
+    def cambiar_proveedor(self, p, n, c):
+        self._sugerir_cambio(p, n, c)
+
+    @Rule(Proveedor(producto=MATCH.p, nombre=MATCH.n),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 5)),
+        salience=20)
+    def proveedor_alternativo(self, p, n, c):
+        self._sugerir_alternativa(p, n, c)
+
+    @Rule(Categoria(producto=MATCH.p, nombre="Perecedero"),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c > 30)),
+        salience=20)
+    def sobrestock_perecedero(self, p, c):
+        self.emitir("sobrestock_perecedero", p, c)
+
+    @Rule(Categoria(producto=MATCH.p, nombre="NoPerecedero"),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 5)),
+        salience=15)
+    def no_perecedero_critico(self, p, c):
+        self.emitir("no_perecedero_critico", p, c)
+
+    @Rule(Categoria(producto=MATCH.p, nombre="Crítico"),
+        Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 10)),
+        salience=35)
+    def producto_critico(self, p, c):
+        self.emitir("producto_critico", p, c)
+
+    @Rule(AS.s << Stock(producto=MATCH.p, cantidad=MATCH.c & P(lambda c: c < 0)),
+        salience=100)
+    def evitar_duplicados(self, s, p, c):
+        self.emitir("evitar_duplicados", p, c)
+        self.retract(s)
+
+# Conjuntos de reglas seleccionables al construir el motor
+CONJUNTOS_REGLAS = {"original": InventarioExpertSystem, "filtrado": InventarioFiltrado}
+
+def crear_motor(reglas="original", sink=None, indice=None, perfilar=False):
+    return CONJUNTOS_REGLAS[reglas](sink=sink, indice=indice, perfilar=perfilar)
@@ -1,58 +1,106 @@
 # translator.py
-from rdflib import RDF, RDFS, Literal, XSD
+from rdflib import RDF, Literal, XSD
 from rdflib.namespace import FOAF
 from ontologia import BASE
 from ontologia import SCHEMA
 
 from prueba.sistemaInventario import (Producto, Stock, Demanda, Proveedor, Pedido, Categoria, ConfiabilidadProveedor)
 
-def graph_to_facts(g, engine, confi_map=None):
+# Predicados que se indexan en la pasada única (uno o varios valores por sujeto)
+_UNICOS = (FOAF.name, BASE.nombre, BASE.tieneStock, BASE.tieneDemanda,
+           BASE.nivelDemanda, SCHEMA.itemOffered, BASE.cantidadPedida)
+_MULTIPLES = (BASE.perteneceACategoria, BASE.tieneProveedor, BASE.proveedorPrincipal)
+
+def _indexar(g):
     """
-    Traduce TODO el grafo razonado a hechos del motor Experta.
+    Recorre el grafo UNA vez y arma índices por predicado:
+    - tipos: instancias de Producto y Pedido (en orden de aparición)
+    - unicos[pred][s] = primer objeto; multiples[pred][s] = lista de objetos
+    """
+    productos, pedidos = {}, {}
+    unicos = {p: {} for p in _UNICOS}
+    multiples = {p: {} for p in _MULTIPLES}
+    for s, p, o in g:
+        if p == RDF.type:
+            if o == BASE.Producto:
+                productos[s] = None
+            elif o == BASE.Pedido:
+                pedidos[s] = None
+        elif p in unicos:
+            unicos[p].setdefault(s, o)
+        elif p in multiples:
+            lista = multiples[p].setdefault(s, [])
+            if o not in lista:
+                lista.append(o)
+    return list(productos), list(pedidos), unicos, multiples
+
+def iter_facts(g, confi_map=None):
+    """
+    Generador de hechos (Clase, campos) a partir del grafo razonado,
+    usando índices construidos en una sola pasada sobre los triples.
     - confi_map: dict opcional { proveedor_name: confiabilidad_float }
     """
-    # Productos: nombre, categoria, stock, demanda, proveedor
-    # 1) Productos
-    for pr in g.subjects(RDF.type, BASE.Producto):
-        nombre = str(g.value(pr, FOAF.name) or g.value(pr, BASE.nombre))
-        engine.declare(Producto(nombre=nombre))
-
-        # Categoria(s) por perteneceACategoria
-        for cat in g.objects(pr, BASE.perteneceACategoria):
-            # Obtener nombre de clase concreta
-            if (cat, RDF.type, RDFS.Class) in g or True:
-                cat_name = cat.split("#")[-1]
-                engine.declare(Categoria(producto=nombre, nombre=cat_name))
-
-        # Stock (literal)
-        stock_val = g.value(pr, BASE.tieneStock)
+    productos, pedidos, unicos, multiples = _indexar(g)
+    nombres = unicos[FOAF.name]
+
+    # 1) Productos: nombre, categoria, stock, demanda, proveedor
+    for pr in productos:
+        nombre = str(nombres.get(pr) or unicos[BASE.nombre].get(pr))
+        yield Producto, {"nombre": nombre}
+
+        for cat in multiples[BASE.perteneceACategoria].get(pr, ()):
+            yield Categoria, {"producto": nombre, "nombre": cat.split("#")[-1]}
+
+        stock_val = unicos[BASE.tieneStock].get(pr)
         if isinstance(stock_val, Literal) and stock_val.datatype in (XSD.integer, XSD.int, None):
-            engine.declare(Stock(producto=nombre, cantidad=int(stock_val)))
+            yield Stock, {"producto": nombre, "cantidad": int(stock_val)}
 
-        # Demanda
-        d = g.value(pr, BASE.tieneDemanda)
+        d = unicos[BASE.tieneDemanda].get(pr)
         if d:
-            nivel = g.value(d, BASE.nivelDemanda)
+            nivel = unicos[BASE.nivelDemanda].get(d)
             if isinstance(nivel, Literal):
-                engine.declare(Demanda(producto=nombre, nivel=str(nivel)))
-
-        # Proveedor (normal y principal por subPropertyOf)
-        for prov in g.objects(pr, BASE.tieneProveedor):
-            pname = str(g.value(prov, FOAF.name))
-            engine.declare(Proveedor(producto=nombre, nombre=pname))
-        for prov in g.objects(pr, BASE.proveedorPrincipal):
-            pname = str(g.value(prov, FOAF.name))
-            engine.declare(Proveedor(producto=nombre, nombre=pname))
-
-    # Pedidos (usar schema:itemOffered para enlazar producto)
-    for pe in g.subjects(RDF.type, BASE.Pedido):
-        prod = g.value(pe, SCHEMA.itemOffered)
-        cant = g.value(pe, BASE.cantidadPedida)
+                yield Demanda, {"producto": nombre, "nivel": str(nivel)}
+
+        # Proveedor (normal y principal por subPropertyOf), sin repetir
+        vistos = set()
+        for pred in (BASE.tieneProveedor, BASE.proveedorPrincipal):
+            for prov in multiples[pred].get(pr, ()):
+                if prov not in vistos:
+                    vistos.add(prov)
+                    yield Proveedor, {"producto": nombre, "nombre": str(nombres.get(prov))}
+
+    # 2) Pedidos (usar schema:itemOffered para enlazar producto). El id es el
+    # individuo: dos pedidos iguales del mismo producto siguen siendo dos hechos
+    for pe in pedidos:
+        prod = unicos[SCHEMA.itemOffered].get(pe)
+        cant = unicos[BASE.cantidadPedida].get(pe)
         if prod and isinstance(cant, Literal):
-            pname = str(prod.split("#")[-1])
-            engine.declare(Pedido(producto=pname, cantidad=int(cant)))
+            yield Pedido, {"producto": str(prod.split("#")[-1]), "cantidad": int(cant), "id": str(pe)}
 
-    # Confiabilidad difusa (si viene)
+    # 3) Confiabilidad difusa (si viene)
     if confi_map:
         for n, val in confi_map.items():
-            engine.declare(ConfiabilidadProveedor(nombre=n, valor=float(val)))
+            yield ConfiabilidadProveedor, {"nombre": n, "valor": float(val)}
+
+def declare_in_batches(engine, hechos, tam_lote=1000):
+    """Declara en el motor los (Clase, campos) de un iterable, por lotes."""
+    lote = []
+    total = 0
+    for clase, campos in hechos:
+        lote.append(clase(**campos))
+        if len(lote) >= tam_lote:
+            engine.declare(*lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        engine.declare(*lote)
+        total += len(lote)
+    return total
+
+def graph_to_facts(g, engine, confi_map=None, tam_lote=1000):
+    """
+    Traduce TODO el grafo razonado a hechos del motor Experta.
+    - confi_map: dict opcional { proveedor_name: confiabilidad_float }
+    - tam_lote: cantidad de hechos por llamada a engine.declare
+    """
+    return declare_in_batches(engine, iter_facts(g, confi_map), tam_lote)